@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import concat_events, risk_scores
+
+# ======================================================
+# ANALYTICS CUBE
+# ======================================================
+# One row per (Year, Disaster_Type, State, Risk_Level) with event counts and
+# metric sums. Its size is bounded by the number of distinct dimension values,
+# not by the number of events, so every roll-up below is constant-time with
+# respect to the dataset size.
+
+CUBE_DIMENSIONS = ["Year", "Disaster_Type", "State", "Risk_Level"]
+CUBE_MEASURES = ["Events", "Deaths", "Affected_Population", "Risk_Score"]
+MEASURE_DTYPES = {
+    "Events": np.int64,
+    "Deaths": np.int64,
+    "Affected_Population": np.int64,
+    "Risk_Score": np.float64
+}
+
+
+def year_bounds(year, first, last):
+    # "All", a single year or an inclusive (start, end) range → (start, end)
+    if year == "All":
+        return first, last
+    if isinstance(year, tuple):
+        return year
+    return year, year
+
+
+class AnalyticsCube:
+
+    def __init__(self, df):
+        # Risk scores are summed from their two-decimal float64 values, not
+        # accumulated in the float32 storage type
+        df = df[CUBE_DIMENSIONS + CUBE_MEASURES[1:]].assign(Risk_Score=risk_scores(df["Risk_Score"]))
+        self.cells = (
+            df.groupby(CUBE_DIMENSIONS, observed=True, sort=True)
+            .agg(
+                Events=("Year", "size"),
+                Deaths=("Deaths", "sum"),
+                Affected_Population=("Affected_Population", "sum"),
+                Risk_Score=("Risk_Score", "sum")
+            )
+            .reset_index()
+            # Totals stay 64-bit whatever the (narrow) column types
+            .astype(MEASURE_DTYPES)
+        )
+
+    def extend(self, delta):
+        # Cube of the delta merged cell-by-cell into this one; cost depends
+        # on the delta and the number of cells, not on the event history
+        cells = concat_events([self.cells, AnalyticsCube(delta).cells])
+        out = object.__new__(AnalyticsCube)
+        out.cells = (
+            cells.groupby(CUBE_DIMENSIONS, observed=True, sort=True)[CUBE_MEASURES]
+            .sum()
+            .reset_index()
+            .astype(MEASURE_DTYPES)
+        )
+        return out
+
+    def subset(self, where):
+        # Cube of the cells whose dimensions take one of the given values;
+        # `where` is ((dimension, values), ...) over CUBE_DIMENSIONS
+        cells = self.cells
+        for dimension, values in where:
+            cells = cells[cells[dimension].isin(values)]
+        out = object.__new__(AnalyticsCube)
+        out.cells = cells.reset_index(drop=True)
+        return out
+
+    @property
+    def year_sums(self):
+        # Built on first use from the cells (not the events)
+        if "_year_sums" not in vars(self):
+            self._year_sums = YearPrefixSums(self.cells)
+        return self._year_sums
+
+    def rollup(self, year="All", disaster_type="All"):
+        # `year` is "All", one year or an inclusive (start, end) range
+        cells = self.cells
+        if year != "All":
+            lo, hi = year_bounds(year, None, None)
+            cells = cells[(cells["Year"] >= lo) & (cells["Year"] <= hi)]
+        if disaster_type != "All":
+            cells = cells[cells["Disaster_Type"] == disaster_type]
+        return CubeView(cells, self.year_sums, year, disaster_type)
+
+
+# ======================================================
+# YEAR PREFIX SUMS
+# ======================================================
+# For every (Disaster_Type, State) pair, running totals of each measure over
+# a contiguous year axis, with a leading zero column:
+#     cum[g, i] = total of group g over the years before first_year + i
+# so the total over [lo, hi] is cum[g, hi + 1 - first] - cum[g, lo - first],
+# O(1) per group whatever the range. Per-type sums over all states are kept
+# too, which makes a yearly series (and its rolling mean or year-over-year
+# change) a slice of one array.
+
+TREND_MODES = ["raw", "rolling", "yoy"]
+
+
+class YearPrefixSums:
+
+    def __init__(self, cells):
+        grouped = (
+            cells.groupby(["Disaster_Type", "State", "Year"], observed=True)[CUBE_MEASURES]
+            .sum()
+            .reset_index()
+        )
+        years = grouped["Year"].to_numpy()
+        self.first_year = int(years.min()) if len(years) else 0
+        self.last_year = int(years.max()) if len(years) else -1
+        n_years = self.last_year - self.first_year + 1
+
+        group_codes, groups = pd.MultiIndex.from_frame(
+            grouped[["Disaster_Type", "State"]]
+        ).factorize()
+        self.types = np.asarray(groups.get_level_values(0), dtype=object)
+        self.states = np.asarray(groups.get_level_values(1), dtype=object)
+
+        self.cum = {}
+        for measure in CUBE_MEASURES:
+            dense = np.zeros((len(groups), n_years + 1), dtype=MEASURE_DTYPES[measure])
+            dense[group_codes, years - self.first_year + 1] = grouped[measure].to_numpy()
+            self.cum[measure] = np.cumsum(dense, axis=1)
+
+        self.groups_by_type = {
+            t: np.flatnonzero(self.types == t) for t in pd.unique(self.types)
+        }
+        self._type_cum = {}
+
+    def _groups(self, disaster_type):
+        if disaster_type == "All":
+            return slice(None)
+        return self.groups_by_type.get(disaster_type, np.empty(0, dtype=np.int64))
+
+    def _span(self, year):
+        # Column bounds [i0, i1) on the cumulative axis, clipped to the data
+        lo, hi = year_bounds(year, self.first_year, self.last_year)
+        lo, hi = max(lo, self.first_year), min(hi, self.last_year)
+        if hi < lo:
+            return 0, 0
+        return lo - self.first_year, hi - self.first_year + 1
+
+    def type_cum(self, disaster_type, measure):
+        # Running totals over all states of one type (or all types)
+        key = (disaster_type, measure)
+        if key not in self._type_cum:
+            self._type_cum[key] = self.cum[measure][self._groups(disaster_type)].sum(axis=0)
+        return self._type_cum[key]
+
+    def totals(self, year="All", disaster_type="All"):
+        i0, i1 = self._span(year)
+        return {
+            measure: (cum[self._groups(disaster_type), i1] - cum[self._groups(disaster_type), i0]).sum()
+            for measure, cum in self.cum.items()
+        }
+
+    def by_state(self, year="All", disaster_type="All", measure="Events"):
+        # Range total per state, from one subtraction per group
+        i0, i1 = self._span(year)
+        g = self._groups(disaster_type)
+        cum = self.cum[measure]
+        return pd.Series(cum[g, i1] - cum[g, i0]).groupby(self.states[g]).sum()
+
+    def trend(self, year="All", disaster_type="All", measure="Events", mode="raw", window=3):
+        # Per-year values, trailing `window`-year mean or change from the
+        # previous year. The rolling window and YoY reach back before the
+        # range start when the data does; the first year of the data has no
+        # previous year, so its change is NaN.
+        i0, i1 = self._span(year)
+        cum = self.type_cum(disaster_type, measure)
+        idx = np.arange(i0, i1)
+        if mode == "rolling":
+            start = np.maximum(idx + 1 - window, 0)
+            values = (cum[idx + 1] - cum[start]) / (idx + 1 - start)
+        elif mode == "yoy":
+            current = cum[idx + 1] - cum[idx]
+            previous = cum[idx] - cum[np.maximum(idx - 1, 0)]
+            values = np.where(idx > 0, current - previous, np.nan)
+        else:
+            values = cum[idx + 1] - cum[idx]
+        return pd.DataFrame({"Year": idx + self.first_year, measure: values})
+
+
+class CubeView:
+    # Cube cells matching one filter selection, rolled up on demand. Totals,
+    # the yearly series and per-state totals come from the prefix sums.
+
+    def __init__(self, cells, sums, year="All", disaster_type="All"):
+        self.cells = cells
+        self.sums = sums
+        self.year = year
+        self.disaster_type = disaster_type
+        totals = sums.totals(year, disaster_type)
+
+        self.events = int(totals["Events"])
+        self.deaths = int(totals["Deaths"])
+        self.affected = int(totals["Affected_Population"])
+        self.avg_risk = (
+            round(float(totals["Risk_Score"]) / self.events, 2)
+            if self.events else 0
+        )
+
+    @property
+    def empty(self):
+        return self.events == 0
+
+    def total(self, dimension, measure="Events"):
+        return self.cells.groupby(dimension, observed=True)[measure].sum()
+
+    def counts(self, dimension):
+        # Same shape as value_counts(): most frequent first
+        out = self.total(dimension).sort_values(ascending=False, kind="stable")
+        return pd.DataFrame({dimension: out.index, "Count": out.to_numpy()})
+
+    def yearly_events(self):
+        # Only years that have events, as before
+        out = self.trend()
+        return out[out["Events"] > 0].reset_index(drop=True)
+
+    def trend(self, mode="raw", window=3, measure="Events"):
+        return self.sums.trend(self.year, self.disaster_type, measure, mode, window)
+
+    def top_states(self, n=10):
+        events = self.sums.by_state(self.year, self.disaster_type, "Events")
+        out = (
+            self.sums.by_state(self.year, self.disaster_type, "Affected_Population")[events > 0]
+            .sort_values(ascending=False, kind="stable")
+            .head(n)
+        )
+        return pd.DataFrame({"State": out.index, "Affected_Population": out.to_numpy()})
+
+    def dominant(self, dimension):
+        # Matches Series.mode()[0]: highest count, ties broken by smallest value
+        if self.empty:
+            return "N/A"
+        out = self.total(dimension)
+        return min(out.index[out == out.max()])
@@ -0,0 +1,191 @@
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+# ======================================================
+# CONFIG
+# ======================================================
+DEFAULT_THREADS = 8
+DEFAULT_DURATION = 10.0
+STARTUP_TIMEOUT = 120.0
+
+
+# ======================================================
+# REQUEST MIX
+# ======================================================
+def request_mix(host, port):
+    # Dashboard-like queries: totals and breakdowns for every year and type,
+    # top states, the first page of events and small GeoJSON subsets
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request("GET", "/aggregate?by=Year")
+    years = [g["Year"] for g in json.loads(conn.getresponse().read())["groups"]]
+    conn.request("GET", "/aggregate?by=Disaster_Type")
+    types = [g["Disaster_Type"] for g in json.loads(conn.getresponse().read())["groups"]]
+    conn.close()
+
+    paths = []
+    for year in ["All"] + sorted(years)[-10:]:
+        for disaster_type in ["All"] + types:
+            q = {"year": year, "disaster_type": disaster_type}
+            paths.append(f"/aggregate?{urlencode(q)}")
+            paths.append(f"/top-states?{urlencode(q)}")
+            paths.append(f"/events?{urlencode({**q, 'limit': 50})}")
+            paths.append(f"/geojson?{urlencode({**q, 'limit': 200})}")
+    return paths
+
+
+# ======================================================
+# LOAD GENERATOR
+# ======================================================
+def worker(host, port, paths, start, deadline, use_etags, results):
+    # One keep-alive connection per thread, cycling through the mix
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    latencies = []
+    statuses = {}
+    sent = 0
+
+    i = start
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+
+        headers = {"Accept-Encoding": "gzip"}
+        if use_etags and path in etags:
+            headers["If-None-Match"] = etags[path]
+
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            statuses["error"] = statuses.get("error", 0) + 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+        statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        sent += len(body)
+        if resp.getheader("ETag"):
+            etags[path] = resp.getheader("ETag")
+
+    conn.close()
+    results.append((latencies, statuses, sent))
+
+
+def run_load(host, port, paths, threads, duration, use_etags):
+    results = []
+    deadline = time.perf_counter() + duration
+    pool = [
+        threading.Thread(
+            target=worker,
+            args=(host, port, paths, n * len(paths) // threads, deadline, use_etags, results)
+        )
+        for n in range(threads)
+    ]
+
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies = sorted(l for r in results for l in r[0])
+    statuses = {}
+    for _, s, _ in results:
+        for code, n in s.items():
+            statuses[code] = statuses.get(code, 0) + n
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 2),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pct(0.5), 2),
+        "p90_ms": round(pct(0.9), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "mb_sent": round(sum(r[2] for r in results) / 1e6, 2),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)}
+    }
+
+
+# ======================================================
+# LOCAL SERVER
+# ======================================================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(data):
+    # Start api_server.py in its own process (no GIL shared with the load
+    # generator) and wait until it answers /health
+    port = free_port()
+    cmd = [sys.executable, "api_server.py", "--port", str(port)]
+    if data:
+        cmd += ["--data", data]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("api_server.py exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("api_server.py did not start in time")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the HTTP/JSON query API")
+    parser.add_argument("--url", default=None,
+                        help="running server, e.g. http://127.0.0.1:8502 (default: start one)")
+    parser.add_argument("--data", default=None, help="dataset for the spawned server")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per phase")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        proc, port = spawn_server(args.data)
+        host = "127.0.0.1"
+
+    try:
+        paths = request_mix(host, port)
+        print(f"🎯 {len(paths)} distinct queries, {args.threads} connections, {args.duration:.0f}s per phase")
+
+        # Cold-ish: every response body is sent (the first pass fills the
+        # server's response cache); revalidating: clients send If-None-Match
+        for phase, use_etags in (("full responses", False), ("etag revalidation", True)):
+            report = run_load(host, port, paths, args.threads, args.duration, use_etags)
+            print(f"\n{phase}:")
+            print(json.dumps(report, indent=2))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
@@ -0,0 +1,333 @@
+import argparse
+import gzip
+import hashlib
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from aggregates import CUBE_DIMENSIONS, CUBE_MEASURES, TREND_MODES
+from caches import LRUCache
+from data_loader import EVENT_COLUMNS, GEOJSON_PATH, risk_scores
+from dataset import DatasetStore
+from indexes import take_rows
+
+# ======================================================
+# CONFIG
+# ======================================================
+API_HOST = "127.0.0.1"
+API_PORT = 8502
+
+# Encoded responses kept per (path, query, dataset version)
+RESPONSE_CACHE_SIZE = 512
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 5000
+MAX_GEOJSON_FEATURES = 20_000
+DEFAULT_RADIUS_KM = 150
+
+# Multi-value filters: ?states=Kerala,Odisha&risk_levels=High,Severe
+WHERE_PARAMS = {
+    "years": "Year",
+    "types": "Disaster_Type",
+    "states": "State",
+    "risk_levels": "Risk_Level",
+    "sources": "Source"
+}
+
+
+class QueryError(ValueError):
+    # Bad query parameters; answered with 400
+    pass
+
+
+# ======================================================
+# PARAMETERS
+# ======================================================
+def filter_params(data, params):
+    # Same filters as the dashboard sidebar:
+    # ?year=2010&disaster_type=Flood&near=Kerala&radius_km=150&states=Kerala,Goa
+    # plus q=kerala+flood, a prefix search over event names, states and sources
+    # year is All, one year or an inclusive range such as 2010-2020
+    year = params.get("year", "All")
+    if year != "All":
+        parts = year.split("-", 1)
+        if len(parts) == 2 and not all(part.strip() for part in parts):
+            raise QueryError(f"year range {year!r} needs both a start and an end year, e.g. 2010-2020")
+        try:
+            bounds = tuple(int(y) for y in parts)
+        except ValueError:
+            raise QueryError(f"year must be a year, a range like 2010-2020 or All, got {year!r}")
+        if bounds[0] > bounds[-1]:
+            raise QueryError(f"year range {year!r} ends before it starts")
+        year = bounds[0] if len(bounds) == 1 or bounds[0] == bounds[1] else bounds
+
+    near = params.get("near", "All")
+    if near != "All" and near not in data.places:
+        raise QueryError(f"unknown location {near!r}")
+
+    where = []
+    for name, column in WHERE_PARAMS.items():
+        values = [v.strip() for v in params.get(name, "").split(",") if v.strip()]
+        if column == "Year":
+            try:
+                values = [int(v) for v in values]
+            except ValueError:
+                raise QueryError(f"{name} must be a comma-separated list of years")
+        if values:
+            where.append((column, tuple(sorted(values))))
+
+    return {
+        "year": year,
+        "disaster_type": params.get("disaster_type", "All"),
+        "near": near,
+        "radius_km": int_param(params, "radius_km", DEFAULT_RADIUS_KM, 1, 5000) if near != "All" else None,
+        "where": tuple(where),
+        "search": params.get("q", "").strip()
+    }
+
+
+def int_param(params, name, default, lo, hi=None):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if value < lo or (hi is not None and value > hi):
+        raise QueryError(f"{name} is out of range")
+    return value
+
+
+def choice_param(params, name, default, choices):
+    value = params.get(name, default)
+    if value not in choices:
+        raise QueryError(f"{name} must be one of {', '.join(choices)}")
+    return value
+
+
+# ======================================================
+# QUERIES
+# ======================================================
+# Each query takes the dataset snapshot and the query string parameters and
+# returns a JSON-serialisable dict.
+
+def health_query(data, params):
+    return {"status": "ok", "version": data.version, "events": len(data)}
+
+
+def events_query(data, params):
+    filters = filter_params(data, params)
+    offset = int_param(params, "offset", 0, 0)
+    limit = int_param(params, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+
+    rows = data.select(**filters)
+    page = take_rows(data.df, rows[offset:offset + limit])
+    return {
+        "version": data.version,
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "events": page[EVENT_COLUMNS].assign(Risk_Score=risk_scores(page["Risk_Score"])).to_dict("records")
+    }
+
+
+def aggregate_query(data, params):
+    # Totals for the filters plus one measure grouped by one cube dimension
+    filters = filter_params(data, params)
+    by = choice_param(params, "by", "Disaster_Type", CUBE_DIMENSIONS)
+    measure = choice_param(params, "measure", "Events", CUBE_MEASURES)
+
+    stats = data.stats(**filters)
+    grouped = stats.total(by, measure).sort_values(ascending=False, kind="stable")
+    return {
+        "version": data.version,
+        "events": stats.events,
+        "deaths": stats.deaths,
+        "affected": stats.affected,
+        "avg_risk": stats.avg_risk,
+        "dominant_risk_level": stats.dominant("Risk_Level"),
+        "by": by,
+        "measure": measure,
+        "groups": [{by: key, measure: value} for key, value in zip(grouped.index.tolist(), grouped.tolist())]
+    }
+
+
+def trend_query(data, params):
+    # Per-year series for the filters: raw values, a trailing rolling mean
+    # or the change from the previous year (from the year prefix sums)
+    filters = filter_params(data, params)
+    measure = choice_param(params, "measure", "Events", CUBE_MEASURES)
+    mode = choice_param(params, "mode", "raw", TREND_MODES)
+    window = int_param(params, "window", 3, 1, 50)
+
+    series = data.stats(**filters).trend(mode, window, measure)
+    return {
+        "version": data.version,
+        "measure": measure,
+        "mode": mode,
+        "years": series["Year"].tolist(),
+        # NaN (YoY of the first year) is not valid JSON
+        "values": [None if math.isnan(v) else v for v in series[measure].tolist()]
+    }
+
+
+def top_states_query(data, params):
+    filters = filter_params(data, params)
+    n = int_param(params, "n", 10, 1, 100)
+    top = data.stats(**filters).top_states(n)
+    return {"version": data.version, "states": top.to_dict("records")}
+
+
+def geojson_query(data, params):
+    # FeatureCollection of the selected events, in the source GeoJSON shape
+    filters = filter_params(data, params)
+    limit = int_param(params, "limit", MAX_GEOJSON_FEATURES, 1, MAX_GEOJSON_FEATURES)
+
+    rows = data.select(**filters)
+    return {
+        "type": "FeatureCollection",
+        "version": data.version,
+        "total": len(rows),
+        "truncated": len(rows) > limit,
+        "features": data.features.take(rows[:limit])
+    }
+
+
+ROUTES = {
+    "/health": health_query,
+    "/events": events_query,
+    "/aggregate": aggregate_query,
+    "/top-states": top_states_query,
+    "/trend": trend_query,
+    "/geojson": geojson_query
+}
+
+
+# ======================================================
+# RESPONSE ENCODING
+# ======================================================
+def encode_response(payload, version):
+    # Body, its gzip form (when worth it) and an ETag tied to the dataset
+    # version, built once per distinct query and served from the cache after
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return {
+        "etag": f'"{version}-{digest}"',
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+    }
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+def accepts_gzip(header):
+    return any(
+        part.split(";")[0].strip() == "gzip" and "q=0" not in part.replace(" ", "")
+        for part in (header or "").split(",")
+    )
+
+
+# ======================================================
+# HTTP SERVER
+# ======================================================
+class ApiHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a client can reuse its connection between queries;
+    # without TCP_NODELAY the separate header/body writes stall on delayed ACKs
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "DisasterAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = ROUTES.get(url.path)
+        if query is None:
+            return self.send_json(404, {"error": f"unknown endpoint {url.path}", "endpoints": sorted(ROUTES)})
+
+        params = dict(parse_qsl(url.query))
+        data = self.server.store.current()
+        key = (url.path, tuple(sorted(params.items())), data.version)
+
+        try:
+            entry = self.server.responses.get_or_build(
+                key, lambda: encode_response(query(data, params), data.version)
+            )
+        except QueryError as e:
+            return self.send_json(400, {"error": str(e)})
+
+        if etag_matches(self.headers.get("If-None-Match"), entry["etag"]):
+            self.send_response(304)
+            self.send_header("ETag", entry["etag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = entry["body"]
+        gzipped = entry["gzip"] is not None and accepts_gzip(self.headers.get("Accept-Encoding"))
+        if gzipped:
+            body = entry["gzip"]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", entry["etag"])
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, verbose=False):
+        super().__init__(address, ApiHandler)
+        self.store = store
+        self.responses = LRUCache(max_entries=RESPONSE_CACHE_SIZE)
+        self.verbose = verbose
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="HTTP/JSON query API over the disaster events")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--data", default=str(GEOJSON_PATH), help="base GeoJSON (segments are picked up too)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = DatasetStore(args.data)
+    server = ApiServer((args.host, args.port), store, verbose=args.verbose)
+
+    print(f"📊 Events loaded: {len(store.current())}")
+    print(f"🌐 Serving on http://{args.host}:{server.server_port} ({', '.join(sorted(ROUTES))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
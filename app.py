@@ -1,19 +1,66 @@
 import streamlit as st
 import pandas as pd
-import json
 import plotly.express as px
-import folium
-from folium.plugins import MarkerCluster
+import streamlit.components.v1 as components
 from streamlit_folium import st_folium
-import pyttsx3
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
 
+from caches import LRUCache
+from data_loader import GEOJSON_PATH, EVENT_COLUMNS
+from dataset import INGEST_POLL_SECONDS, DatasetStore
+from aggregates import TREND_MODES
+from assistant import ASSISTANT_HELP, QuestionParser, answer_question, normalize_question, render_answer
+from memory_usage import SessionRegistry, deep_nbytes
+from profiling import PROFILER
+from tts_service import TTSService
+from indexes import intersect_rows, take_rows
+from map_layers import (
+    DEFAULT_MAP_MODE,
+    VIEWPORT_MAP_MODES,
+    VIEWPORT_MAX_POINTS,
+    bounds_contain,
+    expand_bounds,
+    render_map_html,
+    view_bounds,
+    viewport_base_map,
+    viewport_layer
+)
+
 
 # ======================================================
 # PAGE CONFIG
 # ======================================================
 st.set_page_config(page_title="Disaster Monitoring System", layout="wide")
 
+# Per-section timing for this rerun (DISASTER_PROFILE=1; no-op otherwise)
+run_profile = PROFILER.start_run()
+run_profile.section("layout")
+
+# Map rendering mode: "fast_cluster", "geojson", "markers", "aggregated"
+# or "viewport"
+MAP_MODE = os.environ.get("DISASTER_MAP_MODE", DEFAULT_MAP_MODE)
+
+# Rendered map HTML kept per (filters, language, dataset version). Pages are
+# large (~13 MB per 100k points clustered, far more as plain markers) and the
+# cache is shared by every session, so it is bounded by size first
+MAP_CACHE_BYTES = 128 * 1024 * 1024
+MAP_CACHE_SIZE = 32
+
+# Analytics figures kept per (filters, language, dataset version)
+FIGURE_CACHE_SIZE = 64
+
+# Years in the trend chart's rolling average
+TREND_WINDOW = 3
+
+# Assistant answers kept per (question, dataset version)
+ANSWER_CACHE_SIZE = 256
+
+# Records table: "paginated" (sorted server-side, one page sent) or "full"
+TABLE_MODE = os.environ.get("DISASTER_TABLE_MODE", "paginated")
+TABLE_PAGE_SIZES = [25, 50, 100, 250, 500]
+TABLE_DEFAULT_PAGE_SIZE = int(os.environ.get("DISASTER_TABLE_PAGE_SIZE", "50"))
+
 st.markdown("""
 <style>
 /* Make entire app use full height */
@@ -83,7 +130,9 @@ LANG = {
 "Disaster_Type": "Disaster Type",
 "total_events": "Total Events",
 "total_affected_population": "Total Affected Population",
-"read_summary": "Read Summary"
+"read_summary": "Read Summary",
+"state": "State",
+"assistant_help": "Ask about a disaster type, state, year or metric, e.g. \"deaths from cyclones in Odisha since 2015\"."
   },
 
     "Tamil": {
@@ -120,7 +169,9 @@ LANG = {
 "disaster_type_label": "பேரிடர் வகை",
 "total_events": "மொத்த நிகழ்வுகள்",
 "total_affected_population": "மொத்த பாதிக்கப்பட்ட மக்கள்",
-"read_summary": "சுருக்கத்தை வாசிக்க"
+"read_summary": "சுருக்கத்தை வாசிக்க",
+"state": "மாநிலம்",
+"assistant_help": "பேரிடர் வகை, மாநிலம், ஆண்டு அல்லது அளவீடு பற்றி கேளுங்கள், எ.கா. \"deaths from cyclones in Odisha since 2015\"."
 
 
     },
@@ -158,7 +209,9 @@ LANG = {
 "disaster_type_label": "आपदा प्रकार",
 "total_events": "कुल घटनाएँ",
 "total_affected_population": "कुल प्रभावित जनसंख्या",
-"read_summary": "सारांश पढ़ें"
+"read_summary": "सारांश पढ़ें",
+"state": "राज्य",
+"assistant_help": "आपदा प्रकार, राज्य, वर्ष या मीट्रिक के बारे में पूछें, जैसे \"deaths from cyclones in Odisha since 2015\"।"
 
     },
 
@@ -196,7 +249,9 @@ LANG = {
 "disaster_type_label": "విపత్తు రకం",
 "total_events": "మొత్తం సంఘటనలు",
 "total_affected_population": "మొత్తం ప్రభావిత జనాభా",
-"read_summary": "సారాంశం వినండి"
+"read_summary": "సారాంశం వినండి",
+"state": "రాష్ట్రం",
+"assistant_help": "విపత్తు రకం, రాష్ట్రం, సంవత్సరం లేదా సూచిక గురించి అడగండి, ఉదా. \"deaths from cyclones in Odisha since 2015\"."
 
     },
 
@@ -234,7 +289,9 @@ LANG = {
 "disaster_type_label": "ദുരന്ത തരം",
 "total_events": "ആകെ സംഭവങ്ങൾ",
 "total_affected_population": "ആകെ ബാധിത ജനസംഖ്യ",
-"read_summary": "സംഗ്രഹം വായിക്കുക"
+"read_summary": "സംഗ്രഹം വായിക്കുക",
+"state": "സംസ്ഥാനം",
+"assistant_help": "ദുരന്ത തരം, സംസ്ഥാനം, വർഷം അല്ലെങ്കിൽ സൂചിക എന്നിവയെക്കുറിച്ച് ചോദിക്കുക, ഉദാ. \"deaths from cyclones in Odisha since 2015\"."
 
 
     },
@@ -273,7 +330,9 @@ LANG = {
 "disaster_type_label": "Type de catastrophe",
 "total_events": "Nombre total d'événements",
 "total_affected_population": "Population totale affectée",
-"read_summary": "Lire le résumé"
+"read_summary": "Lire le résumé",
+"state": "État",
+"assistant_help": "Posez une question sur un type de catastrophe, un État, une année ou un indicateur, p. ex. \"deaths from cyclones in Odisha since 2015\"."
 
 
     },
@@ -312,7 +371,9 @@ LANG = {
 "disaster_type_label": "ವಿಪತ್ತು ಪ್ರಕಾರ",
 "total_events": "ಒಟ್ಟು ಘಟನೆಗಳು",
 "total_affected_population": "ಒಟ್ಟು ಪರಿಣಾಮಿತ ಜನಸಂಖ್ಯೆ",
-"read_summary": "ಸಾರಾಂಶ ಓದಿ"
+"read_summary": "ಸಾರಾಂಶ ಓದಿ",
+"state": "ರಾಜ್ಯ",
+"assistant_help": "ವಿಪತ್ತು ಪ್ರಕಾರ, ರಾಜ್ಯ, ವರ್ಷ ಅಥವಾ ಅಳತೆಯ ಬಗ್ಗೆ ಕೇಳಿ, ಉದಾ. \"deaths from cyclones in Odisha since 2015\"."
 
 
     },
@@ -350,7 +411,9 @@ LANG = {
 "disaster_type_label": "Tipo de desastre",
 "total_events": "Total de eventos",
 "total_affected_population": "Población total afectada",
-"read_summary": "Leer resumen"
+"read_summary": "Leer resumen",
+"state": "Estado",
+"assistant_help": "Pregunte por un tipo de desastre, estado, año o métrica, p. ej. \"deaths from cyclones in Odisha since 2015\"."
     },
 
     "German": {
@@ -387,7 +450,9 @@ LANG = {
 "disaster_type_label": "Katastrophentyp",
 "total_events": "Gesamtanzahl der Ereignisse",
 "total_affected_population": "Gesamt betroffene Bevölkerung",
-"read_summary": "Zusammenfassung lesen"
+"read_summary": "Zusammenfassung lesen",
+"state": "Bundesstaat",
+"assistant_help": "Fragen Sie nach Katastrophenart, Bundesstaat, Jahr oder Kennzahl, z. B. \"deaths from cyclones in Odisha since 2015\"."
 
 
     },
@@ -426,7 +491,9 @@ LANG = {
 "disaster_type_label": "نوع الكارثة",
 "total_events": "إجمالي الأحداث",
 "total_affected_population": "إجمالي السكان المتضررين",
-"read_summary": "قراءة الملخص"
+"read_summary": "قراءة الملخص",
+"state": "الولاية",
+"assistant_help": "اسأل عن نوع الكارثة أو الولاية أو السنة أو المقياس، مثل \"deaths from cyclones in Odisha since 2015\"."
 
 
     }
@@ -445,132 +512,228 @@ st.info(L["theme_note"])
 # ======================================================
 # LOAD DATA
 # ======================================================
-@st.cache_data
-def load_geojson():
-    with open("data/new_original_india_disasters_synthetic_verified.geojson", "r") as f:
-        return json.load(f)
+@st.cache_resource
+def load_dataset_store():
+    # Held once per process and shared by every session and rerun. Loads the
+    # columnar sidecar, then merges new NDJSON segments as they are appended
+    # (only the new events are parsed and folded into the indexes).
+    return DatasetStore(GEOJSON_PATH)
+
+run_profile.section("data_load")
+dataset_store = load_dataset_store()
+
+# One snapshot per rerun, so every section below sees the same events
+data = dataset_store.current()
 
-def geojson_to_df(geojson):
-    rows = []
-    for f in geojson["features"]:
-        p = f["properties"]
-        rows.append({
-            "Year": p["year"],
-            "Disaster_Type": p["disaster_type"],
-            "State": p.get("state", "Unknown"),
-            "Deaths": p.get("Deaths", 0),
-            "Affected_Population": p.get("Affected_Population", 0),
-            "Risk_Score": p.get("Risk_Score", 0),
-            "Risk_Level": p.get("incident_level", "Unknown"),
-            "Event_Name": p.get("event_name", ""),
-            "Source": p.get("source", "")
-        })
-    return pd.DataFrame(rows)
+run_profile.section("dataframe")
+df = data.df
+filter_index = data.filter_index
+places = data.places
 
-# ✅ FIRST load geojson
-geojson = load_geojson()
+# Map features are rebuilt lazily from the event columns
+features = data.features
 
-# ✅ THEN convert to dataframe
-df = geojson_to_df(geojson)
+@st.fragment(run_every=INGEST_POLL_SECONDS)
+def watch_dataset():
+    # Rerun the page when new events have been ingested
+    if dataset_store.current().version != data.version:
+        st.rerun()
+
+watch_dataset()
 
 
 # ======================================================
 # FILTERS
 # ======================================================
+run_profile.section("filtering")
 st.sidebar.header(L["filters"])
 
-year = st.sidebar.selectbox(
-    L["year"],
-    ["All"] + sorted(df["Year"].unique(), reverse=True)
-)
+# Prefix search over event names, states and sources (inverted index), e.g.
+# "kerala flood" or "central water"; combined with every other filter
+search = st.sidebar.text_input(
+    L.get("search", "Search Events"), placeholder="kerala flood, central water…"
+).strip()
+
+# Year range; the full range means "All" and a one-year range a single year,
+# so both keep using the per-year indexes and cache entries. Years picked
+# under "More Filters" (rendered further down, read from the session) take
+# over: the slider is disabled instead of being silently ANDed with them.
+picked_years = sorted(st.session_state.get("more_filter_years") or [])
+first_year, last_year = filter_index.years[0], filter_index.years[-1]
+year = "All"
+if first_year < last_year:
+    year_range = st.sidebar.slider(
+        L["year"], first_year, last_year, (first_year, last_year), disabled=bool(picked_years)
+    )
+    if picked_years:
+        st.sidebar.caption(L.get("years_override", "Using the years picked under More Filters"))
+    elif year_range != (first_year, last_year):
+        year = year_range[0] if year_range[0] == year_range[1] else year_range
+if picked_years:
+    year_text = ", ".join(str(y) for y in picked_years)
+else:
+    year_text = f"{year[0]}–{year[1]}" if isinstance(year, tuple) else year
+
+# One type keeps the per-type indexes; none means "All"
+disaster_types = st.sidebar.multiselect(L["type"], filter_index.types, placeholder="All")
+disaster_type = disaster_types[0] if len(disaster_types) == 1 else "All"
 
-disaster_type = st.sidebar.selectbox(
-    L["type"],
-    ["All"] + sorted(df["Disaster_Type"].unique())
+near = st.sidebar.selectbox(
+    L.get("near", "Near Location"),
+    ["All"] + sorted(places)
 )
 
-filtered_df = df.copy()
-if year != "All":
-    filtered_df = filtered_df[filtered_df["Year"] == year]
-if disaster_type != "All":
-    filtered_df = filtered_df[filtered_df["Disaster_Type"] == disaster_type]
+radius_km = None
+if near != "All":
+    radius_km = st.sidebar.slider(L.get("radius_km", "Radius (km)"), 10, 1000, 150, step=10)
+
+# Multi-value filters, answered from the bitmap index: values OR within a
+# column, columns AND together. Sorted so the cache keys below are stable.
+with st.sidebar.expander(L.get("more_filters", "More Filters")):
+    picked = {
+        "Year": st.multiselect(L.get("years", "Years"), data.values("Year"), placeholder="All", key="more_filter_years"),
+        "State": st.multiselect(L.get("state", "State"), data.values("State"), placeholder="All"),
+        "Risk_Level": st.multiselect(L.get("risk_level_filter", "Risk Level"), data.values("Risk_Level"), placeholder="All"),
+        "Source": st.multiselect(L.get("source", "Source"), data.values("Source"), placeholder="All")
+    }
+if len(disaster_types) > 1:
+    picked["Disaster_Type"] = disaster_types
+where = tuple((column, tuple(sorted(values))) for column, values in picked.items() if values)
+
+# Answered from the precomputed indexes: no full scan, no full copy.
+# The session only holds these row ids; frames are built from them on use.
+selected_rows = data.select(year, disaster_type, near, radius_km, where, search)
+
+# Summary, charts and metrics all roll up one view of the cube
+stats = data.stats(year, disaster_type, near, radius_km, where, search, rows=selected_rows)
 
 # ======================================================
 # TABULATION
 # ======================================================
+run_profile.section("table")
 st.subheader(f"📋 {L['table']}")
-st.dataframe(filtered_df, use_container_width=True)
 
-# ======================================================
-# MAP (BIG HOVER TOOLTIP – NO CLICK)
-# ======================================================
-st.subheader(f"🗺️ {L['map']}")
+if TABLE_MODE == "paginated":
+    # Only the visible page is materialised and sent to the browser
+    total_rows = len(selected_rows)
+    sort_col, order_col, size_col, page_col = st.columns([3, 2, 2, 2])
 
-def filter_geo(features, filtered_df):
-    allowed_keys = set(
-        filtered_df.apply(
-            lambda r: f"{r['Year']}_{r['Disaster_Type']}_{r.get('Event_Name','')}",
-            axis=1
-        )
+    sort_by = sort_col.selectbox(
+        L.get("sort_by", "Sort by"),
+        [None] + EVENT_COLUMNS,
+        format_func=lambda c: "—" if c is None else L.get(c, c)
+    )
+    descending = order_col.toggle(L.get("descending", "Descending"), disabled=sort_by is None)
+    page_sizes = sorted(set(TABLE_PAGE_SIZES + [TABLE_DEFAULT_PAGE_SIZE]))
+    page_size = size_col.selectbox(
+        L.get("page_size", "Rows per page"),
+        page_sizes,
+        index=page_sizes.index(TABLE_DEFAULT_PAGE_SIZE)
     )
+    n_pages = max(1, -(-total_rows // page_size))
+    page = page_col.number_input(L.get("page", "Page"), 1, n_pages, 1)
 
-    out = []
-    for f in features:
-        p = f["properties"]
-        key = f"{p['year']}_{p['disaster_type']}_{p.get('event_name','')}"
+    offset = (page - 1) * page_size
+    if sort_by is None:
+        page_rows = selected_rows[offset:offset + page_size]
+    else:
+        page_rows = data.sort_index.page(selected_rows, sort_by, not descending, offset, page_size)
+    table_df = df.iloc[page_rows]
 
-        if key in allowed_keys:
-            out.append(f)
+    if total_rows:
+        st.caption(f"{offset + 1:,}–{offset + len(page_rows):,} / {total_rows:,}")
+else:
+    table_df = take_rows(df, selected_rows)
 
-    return out
+st.dataframe(
+    table_df[EVENT_COLUMNS],
+    use_container_width=True,
+    column_config={"Risk_Score": st.column_config.NumberColumn(format="%.2f")}
+)
 
-geo_filtered = filter_geo(geojson["features"], filtered_df)
+# ======================================================
+# MAP (BIG HOVER TOOLTIP – NO CLICK)
+# ======================================================
+run_profile.section("map")
+st.subheader(f"🗺️ {L['map']}")
 
-if not geo_filtered:
+def filter_geo(features, rows):
+    # Row ids are positions in the feature collection (Feature_Index), so the
+    # map picks exactly the selected features in O(selected).
+    return features.take(rows)
+
+@st.cache_resource
+def load_tts_service():
+    return TTSService()
+
+tts_service = load_tts_service()
+
+@st.cache_resource
+def load_map_cache():
+    return LRUCache(max_entries=MAP_CACHE_SIZE, max_bytes=MAP_CACHE_BYTES, sizeof=len)
+
+map_cache = load_map_cache()
+
+def viewport_events_layer():
+    # Re-query only when the view leaves the area loaded last time (or the
+    # filters / bucket zoom change); otherwise the same layer is reused.
+    # "aggregated" always sends buckets: at most one per grid cell in view.
+    map_state = st.session_state.get("viewport_map")
+    view = view_bounds(map_state)
+    zoom = (map_state or {}).get("zoom")
+    filter_key = (year, disaster_type, near, radius_km, where, search, data.version)
+
+    loaded = st.session_state.get("viewport_loaded")
+    if (
+        loaded is None
+        or loaded["filters"] != filter_key
+        or not bounds_contain(loaded["area"], view)
+        or (loaded["bucketed"] and loaded["zoom"] != zoom)
+    ):
+        area = expand_bounds(view)
+        rows = intersect_rows(selected_rows, data.spatial_index.bbox(*area))
+        bucketed = MAP_MODE == "aggregated" or len(rows) > VIEWPORT_MAX_POINTS
+
+        if bucketed:
+            layer = viewport_layer(buckets=data.cluster_index.buckets(rows, zoom or 0))
+        else:
+            layer = viewport_layer(features=features.take(rows))
+
+        loaded = {
+            "filters": filter_key,
+            "area": area,
+            "zoom": zoom,
+            "bucketed": bucketed,
+            "layer": layer
+        }
+        st.session_state["viewport_loaded"] = loaded
+
+    return loaded["layer"]
+
+if stats.empty:
     st.warning(L["no_data"])
+elif MAP_MODE in VIEWPORT_MAP_MODES:
+    # The base map stays mounted; only the events layer is swapped in. Inside
+    # the loaded area the call is byte-identical, so Streamlit sends the
+    # browser a reference to its cached copy instead of the layer again.
+    st_folium(
+        viewport_base_map(),
+        key="viewport_map",
+        feature_group_to_add=viewport_events_layer(),
+        returned_objects=["bounds", "zoom"],
+        width=1400,
+        height=600
+    )
 else:
-    m = folium.Map(
-        location=[22.5, 78.9],
-        zoom_start= 45,
-        min_zoom=30,
-        max_bounds=True,
-        tiles=None
+    # A hit skips both the folium build and the HTML render
+    map_key = (year, disaster_type, near, radius_km, where, search, language, data.version, MAP_MODE)
+    map_html = map_cache.get_or_build(
+        map_key,
+        lambda: render_map_html(filter_geo(features, selected_rows), MAP_MODE)
     )
+    components.html(map_html, width=1400, height=600)
 
-    folium.TileLayer("OpenStreetMap", no_wrap=True).add_to(m)
-    india_bounds = [[6.5, 68.0], [37.5, 97.5]]
-    cluster = MarkerCluster().add_to(m)
-
-    for f in geo_filtered:
-        p = f["properties"]
-        lon, lat = f["geometry"]["coordinates"]
-        color = "red" if p["incident_level"] == "Major" else "blue"
-
-        hover_html = f"""
-        <div style="font-size:14px; line-height:1.6; width:330px;">
-        <b>{p['event_name']}</b><br><br>
-        <b>Year:</b> {p['year']}<br>
-        <b>Disaster Type:</b> {p['disaster_type']}<br>
-        <b>Incident Level:</b> {p['incident_level']}<br><br>
-        <b>Deaths:</b> {p.get('Deaths','N/A')}<br>
-        <b>Affected Population:</b> {p.get('Affected_Population','N/A')}<br>
-        <b>Risk Score:</b> {round(p.get('Risk_Score',0),2)}<br><br>
-        <b>Source:</b> {p['source']}
-        </div>
-        """
-
-        folium.CircleMarker(
-            location=[lat, lon],
-            radius=5,
-            color=color,
-            fill=True,
-            fill_opacity=0.75,
-            tooltip=folium.Tooltip(hover_html, sticky=True)
-        ).add_to(cluster)
-
-    m.fit_bounds(india_bounds)
-    st_folium(m, width=1400, height=600, returned_objects=[])
-
+if not stats.empty:
     st.markdown(f"""
     **{L['legend']}**  
     🔴 {L['major']}  
@@ -580,6 +743,7 @@ else:
 # ======================================================
 # SUMMARY + OWNER SECTION (SIDE BY SIDE)
 # ======================================================
+run_profile.section("summary")
 st.markdown("---")
 
 col_summary, col_owner = st.columns([2, 1])
@@ -588,21 +752,43 @@ col_summary, col_owner = st.columns([2, 1])
 with col_summary:
     st.subheader(f"📄 {L.get('summary_report', 'Disaster Summary Report')}")
 
-    if not filtered_df.empty:
+    if not stats.empty:
+        filters_md = "".join(
+            f"**{column.replace('_', ' ')}**: {', '.join(map(str, values))}  \n"
+            for column, values in where if column not in ("Disaster_Type", "Year")
+        )
+        if search:
+            filters_md += f"**{L.get('search', 'Search Events')}**: {search}  \n"
         summary_md = f"""
-**{L.get('year_label', 'Year')}**: {year}  
-**{L.get('disaster_type_label', 'Disaster Type')}**: {disaster_type}  
-**{L.get('total_events', 'Total Events')}**: {len(filtered_df)}  
-**{L.get('total_deaths', 'Total Deaths')}**: {int(filtered_df['Deaths'].sum()):,}  
-**{L.get('total_affected_population', 'Total Affected Population')}**: {int(filtered_df['Affected_Population'].sum()):,}  
-**{L.get('avg_risk', 'Average Risk Score')}**: {round(filtered_df['Risk_Score'].mean(), 2)}
+**{L.get('year_label', 'Year')}**: {year_text}  
+**{L.get('disaster_type_label', 'Disaster Type')}**: {", ".join(disaster_types) or "All"}  
+{filters_md}**{L.get('total_events', 'Total Events')}**: {stats.events}  
+**{L.get('total_deaths', 'Total Deaths')}**: {stats.deaths:,}  
+**{L.get('total_affected_population', 'Total Affected Population')}**: {stats.affected:,}  
+**{L.get('avg_risk', 'Average Risk Score')}**: {stats.avg_risk}
 """
         st.markdown(summary_md)
 
         if st.button(f"🔊 {L.get('read_summary', 'Read Summary')}"):
-            engine = pyttsx3.init()
-            engine.say(summary_md)
-            engine.runAndWait()
+            # Rendered off the script thread; repeat requests hit the cache
+            st.session_state["tts_key"] = tts_service.request(language, summary_md)
+
+        tts_key = st.session_state.get("tts_key")
+        if tts_key is not None and tts_key[0] == language:
+            tts_pending = tts_service.status(tts_key)[0] == "pending"
+
+            # Polls only while the audio is still being rendered
+            @st.fragment(run_every=1 if tts_pending else None)
+            def summary_audio():
+                state, error, audio = tts_service.result(tts_key)
+                if audio:
+                    st.audio(audio, format="audio/wav")
+                elif state == "pending":
+                    st.caption("🔊 …")
+                else:
+                    st.warning(error)
+
+            summary_audio()
     else:
         st.warning(L.get("no_data", "No data available"))
 
@@ -687,21 +873,36 @@ with col_owner:
 
 
 # ======================================================
-# PREDEFINED AI ASSISTANT
+# DATA ASSISTANT
 # ======================================================
+run_profile.section("assistant")
+
+@st.cache_resource
+def load_question_parser(types, states):
+    # One parser (and intent cache) per vocabulary of types and states
+    return QuestionParser(types, states)
+
+@st.cache_resource
+def load_answer_cache():
+    return LRUCache(max_entries=ANSWER_CACHE_SIZE)
+
+question_parser = load_question_parser(tuple(data.values("Disaster_Type")), tuple(data.values("State")))
+answer_cache = load_answer_cache()
+
 st.sidebar.subheader(f"🤖 {L['assistant']}")
-q = st.sidebar.text_input(L["ask"])
+q = st.sidebar.text_input(L["ask"], placeholder="deaths from cyclones in Odisha since 2015")
 
 if q:
-    q = q.lower()
-    if "flood" in q:
-        st.sidebar.success("Floods are the most frequent disasters in India.")
-    elif "cyclone" in q:
-        st.sidebar.success("Cyclones mainly affect coastal regions.")
-    elif "risk" in q:
-        st.sidebar.success("High risk correlates with population density.")
+    # Parsed offline and answered from the cube, for the loaded data
+    intent = question_parser.parse(q)
+    if intent["understood"]:
+        answer = answer_cache.get_or_build(
+            (normalize_question(q), data.version),
+            lambda: answer_question(data, intent)
+        )
+        st.sidebar.success(render_answer(answer, L))
     else:
-        st.sidebar.info("Ask about floods, cyclones, or risk.")
+        st.sidebar.info(L.get("assistant_help", ASSISTANT_HELP))
 
 # ======================================================
 # SIDEBAR FOOTER (NO EXTRA SPACE)
@@ -727,49 +928,32 @@ st.sidebar.markdown(
 # ======================================================
 # ADVANCED ANALYTICS (2 x 2 GRID)
 # ======================================================
+run_profile.section("analytics")
 st.markdown("---")
 st.subheader(f"📊 {L['analytics']}")
 
-# -------- Prepare data safely --------
+@st.cache_resource
+def load_figure_cache():
+    return LRUCache(max_entries=FIGURE_CACHE_SIZE)
 
-# 1️⃣ Risk Level Distribution
-risk_df = (
-    filtered_df["Risk_Level"]
-    .value_counts()
-    .reset_index()
-)
-risk_df.columns = ["Risk_Level", "Count"]
+figure_cache = load_figure_cache()
 
-# 2️⃣ Disaster Type Frequency
-type_df = (
-    filtered_df["Disaster_Type"]
-    .value_counts()
-    .reset_index()
-)
-type_df.columns = ["Disaster_Type", "Count"]
+def build_analytics_figures():
+    # -------- Prepare data from the analytics cube --------
 
-# 3️⃣ Year-wise Disaster Trend
-year_df = (
-    filtered_df.groupby("Year")
-    .size()
-    .reset_index(name="Events")
-)
+    # 1️⃣ Risk Level Distribution
+    risk_df = stats.counts("Risk_Level")
 
-# 4️⃣ Top Affected States
-state_df = (
-    filtered_df.groupby("State")["Affected_Population"]
-    .sum()
-    .sort_values(ascending=False)
-    .head(10)
-    .reset_index()
-)
+    # 2️⃣ Disaster Type Frequency
+    type_df = stats.counts("Disaster_Type")
 
-# -------- 2 x 2 Layout --------
-row1_col1, row1_col2 = st.columns(2)
-row2_col1, row2_col2 = st.columns(2)
+    # 3️⃣ Year-wise Disaster Trend (from the year prefix sums)
+    year_df = stats.yearly_events() if trend_mode == "raw" else stats.trend(trend_mode, TREND_WINDOW)
 
-# -------- Chart 1: Risk Level Distribution --------
-with row1_col1:
+    # 4️⃣ Top Affected States
+    state_df = stats.top_states(10)
+
+    # -------- Chart 1: Risk Level Distribution --------
     fig1 = px.bar(
         risk_df,
         x="Risk_Level",
@@ -779,10 +963,8 @@ with row1_col1:
         labels={"Count": L["count"],
                 "Risk_Level": L["risk_level"]}
     )
-    st.plotly_chart(fig1, use_container_width=True)
 
-# -------- Chart 2: Disaster Type Frequency --------
-with row1_col2:
+    # -------- Chart 2: Disaster Type Frequency --------
     fig2 = px.bar(
         type_df,
         x="Disaster_Type",
@@ -792,23 +974,19 @@ with row1_col2:
         labels={"Count": L["count"],
                 "Disaster_Type": L["type"]}
     )
-    st.plotly_chart(fig2, use_container_width=True)
 
-# -------- Chart 3: Year-wise Disaster Trend --------
-with row2_col1:
+    # -------- Chart 3: Year-wise Disaster Trend --------
     fig3 = px.line(
         year_df,
         x="Year",
         y="Events",
         markers=True,
         title=L["year_trend"],
-        labels={"Events": L["events"],
+        labels={"Events": trend_labels[trend_mode],
                 "Year": L["year_label"]}
     )
-    st.plotly_chart(fig3, use_container_width=True)
 
-# -------- Chart 4: Top Affected States --------
-with row2_col2:
+    # -------- Chart 4: Top Affected States --------
     fig4 = px.bar(
         state_df,
         x="State",
@@ -818,6 +996,41 @@ with row2_col2:
         labels={"Affected_Population": L["count"],
                 "State": L["top_states"]}
     )
+    return fig1, fig2, fig3, fig4
+
+# Plotly Express construction is the expensive part; a cached figure only
+# costs Streamlit's JSON serialisation. Figures are never modified after
+# they are built, so every session can share them.
+# -------- 2 x 2 Layout --------
+row1_col1, row1_col2 = st.columns(2)
+row2_col1, row2_col2 = st.columns(2)
+
+trend_labels = {
+    "raw": L["events"],
+    "rolling": L.get("rolling_avg", f"{TREND_WINDOW}-year average"),
+    "yoy": L.get("yoy_change", "Year-over-year change")
+}
+trend_mode = row2_col1.radio(
+    L["year_trend"],
+    TREND_MODES,
+    format_func=trend_labels.get,
+    horizontal=True,
+    label_visibility="collapsed"
+)
+
+figure_key = (year, disaster_type, near, radius_km, where, search, trend_mode, language, data.version)
+fig1, fig2, fig3, fig4 = figure_cache.get_or_build(figure_key, build_analytics_figures)
+
+with row1_col1:
+    st.plotly_chart(fig1, use_container_width=True)
+
+with row1_col2:
+    st.plotly_chart(fig2, use_container_width=True)
+
+with row2_col1:
+    st.plotly_chart(fig3, use_container_width=True)
+
+with row2_col2:
     st.plotly_chart(fig4, use_container_width=True)
 
     
@@ -825,47 +1038,41 @@ with row2_col2:
 # ======================================================
 # KEY METRICS SECTION (LANGUAGE AWARE)
 # ======================================================
+run_profile.section("metrics")
 st.markdown("---")
 st.subheader(f"📌 {L.get('key_metrics', 'Key Disaster Metrics')}")
 
 c1, c2, c3, c4 = st.columns(4)
 
 # ---- Metric 1: Total Deaths ----
-total_deaths = int(filtered_df["Deaths"].sum()) if not filtered_df.empty else 0
 c1.metric(
     L.get("total_deaths", "Total Deaths"),
-    f"{total_deaths:,}"
+    f"{stats.deaths:,}"
 )
 
 # ---- Metric 2: Total Affected ----
-total_affected = int(filtered_df["Affected_Population"].sum()) if not filtered_df.empty else 0
 c2.metric(
     L.get("total_affected", "Total Affected"),
-    f"{total_affected:,}"
+    f"{stats.affected:,}"
 )
 
 # ---- Metric 3: Average Risk Score ----
-avg_risk = round(filtered_df["Risk_Score"].mean(), 2) if not filtered_df.empty else 0
 c3.metric(
     L.get("avg_risk", "Average Risk Score"),
-    avg_risk
+    stats.avg_risk
 )
 
 # ---- Metric 4: Dominant Risk Level ----
-dominant_risk = (
-    filtered_df["Risk_Level"].mode()[0]
-    if not filtered_df.empty
-    else "N/A"
-)
 c4.metric(
     L.get("risk_level", "Dominant Risk Level"),
-    dominant_risk
+    stats.dominant("Risk_Level")
 )
 
 
 # ======================================================
 # FOOTNOTE
 # ======================================================
+run_profile.section("layout")
 
 st.markdown("---")
 st.markdown(
@@ -925,3 +1132,59 @@ html, body, [data-testid="stAppViewContainer"] {
 }
 </style>
 """, unsafe_allow_html=True)
+
+
+# ======================================================
+# MEMORY ACCOUNTING
+# ======================================================
+@st.cache_resource
+def load_session_registry():
+    return SessionRegistry()
+
+session_registry = load_session_registry()
+
+if PROFILER.enabled:
+    # Anything reachable from the shared dataset is left out, so this is
+    # what the session adds on top of it
+    shared_sizes, shared_ids = data.memory()
+    seen = set(shared_ids)
+    ctx = get_script_run_ctx()
+    session_registry.record(
+        ctx.session_id if ctx else "local",
+        retained=deep_nbytes(st.session_state.to_dict(), seen),
+        working=deep_nbytes(selected_rows, seen) + deep_nbytes(table_df, seen)
+    )
+
+
+# ======================================================
+# PROFILING DEBUG PANEL
+# ======================================================
+rerun_ms = run_profile.finish()
+
+if PROFILER.enabled and st.sidebar.checkbox("⏱️ Debug panel"):
+    with st.sidebar.expander("⏱️ Rerun profile", expanded=True):
+        st.caption(f"This rerun: {rerun_ms:.1f} ms")
+        st.dataframe(
+            pd.DataFrame(run_profile.sections).T.round(2),
+            use_container_width=True
+        )
+        st.caption("Recent reruns (this process)")
+        st.dataframe(
+            pd.DataFrame(PROFILER.summary()).T,
+            use_container_width=True
+        )
+        st.caption(f"Map cache: {map_cache.stats()}")
+        st.caption(f"Figure cache: {figure_cache.stats()}")
+        st.caption("Shared dataset (bytes, once per process)")
+        st.dataframe(
+            pd.Series(shared_sizes, name="bytes").to_frame(),
+            use_container_width=True
+        )
+        st.caption("Sessions")
+        st.json(session_registry.report(sum(shared_sizes.values())))
+        st.download_button(
+            "metrics.prom",
+            PROFILER.prometheus_text(),
+            file_name="disaster_metrics.prom",
+            mime="text/plain"
+        )
@@ -0,0 +1,233 @@
+import re
+
+from caches import LRUCache
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Parsed intents kept per normalised question
+INTENT_CACHE_SIZE = 1024
+
+# Rows listed for "which state / year / type ..." questions
+TOP_N = 5
+
+# Metric keywords, matched as word prefixes ("died", "deaths", "killed").
+# Checked in this order, so "how many people died" asks for deaths.
+METRIC_WORDS = {
+    "Deaths": ["death", "dead", "died", "kill", "fatal", "casualt", "mort", "muert", "fallec", "tote", "todes"],
+    "Affected_Population": ["affect", "people", "population", "impact", "afect", "touch", "betroffen"],
+    "Risk_Score": ["risk", "risque", "riesgo", "risiko"],
+    "Events": ["event", "incident", "many", "count", "number", "frequen", "occur", "evento", "ereignis"]
+}
+
+# Words that ask for a ranking, and the dimension each noun ranks by
+RANK_WORDS = ["which", "what", "top", "most", "highest", "worst", "rank", "quel", "cuál", "welche"]
+GROUP_WORDS = {
+    "State": ["state", "région", "estado", "bundesstaat"],
+    "Year": ["year", "année", "año", "jahr"],
+    "Disaster_Type": ["type", "kind", "disaster"]
+}
+
+# (localised label key, English default) per metric and per dimension
+METRIC_LABELS = {
+    "Events": ("total_events", "Total Events"),
+    "Deaths": ("total_deaths", "Total Deaths"),
+    "Affected_Population": ("total_affected_population", "Total Affected Population"),
+    "Risk_Score": ("avg_risk", "Average Risk Score")
+}
+GROUP_LABELS = {
+    "State": ("state", "State"),
+    "Year": ("year_label", "Year"),
+    "Disaster_Type": ("disaster_type_label", "Disaster Type")
+}
+
+ASSISTANT_HELP = 'Ask about a disaster type, state, year or metric, e.g. "deaths from cyclones in Odisha since 2015".'
+
+YEAR = r"(1[89]\d\d|2\d\d\d)"
+YEAR_RANGE = re.compile(rf"\b{YEAR}\s*(?:-|–|to|through|and|until|till)\s*{YEAR}\b")
+YEAR_FROM = re.compile(rf"\b(since|from|after|starting)\s+{YEAR}\b")
+YEAR_UNTIL = re.compile(rf"\b(before|until|till|up to|through)\s+{YEAR}\b")
+LAST_YEARS = re.compile(r"\b(?:last|past)\s+(\d{1,3})\s+years?\b")
+ANY_YEAR = re.compile(rf"\b{YEAR}\b")
+
+
+# ======================================================
+# PARSING
+# ======================================================
+def normalize_question(question):
+    return " ".join(question.lower().split())
+
+
+def _name_pattern(name, whole_word=False):
+    # Case-insensitive match of a (multi-word) name; "flood" also matches
+    # "floods" unless whole_word is set
+    words = r"\s*".join(re.escape(w) for w in name.lower().split())
+    return re.compile(rf"\b{words}" + (r"\b" if whole_word else ""))
+
+
+def _has_word(tokens, stems):
+    return any(t.startswith(s) for t in tokens for s in stems)
+
+
+def _years(text):
+    # (lo, hi) with None for an open end, or ("last", n); None if no years
+    m = LAST_YEARS.search(text)
+    if m:
+        return "last", int(m.group(1))
+    m = YEAR_RANGE.search(text)
+    if m:
+        lo, hi = sorted((int(m.group(1)), int(m.group(2))))
+        return lo, hi
+    m = YEAR_FROM.search(text)
+    if m:
+        year = int(m.group(2))
+        return (year + 1 if m.group(1) == "after" else year), None
+    m = YEAR_UNTIL.search(text)
+    if m:
+        year = int(m.group(2))
+        return None, (year - 1 if m.group(1) == "before" else year)
+    years = sorted(int(y) for y in ANY_YEAR.findall(text))
+    if years:
+        return years[0], years[-1]
+    return None
+
+
+class QuestionParser:
+    # Recognises the disaster types and states of one dataset, years and
+    # year ranges, a metric and an optional ranking dimension in a free-text
+    # question. Shared by every session; intents are cached per question.
+
+    def __init__(self, types, states, cache_size=INTENT_CACHE_SIZE):
+        self.types = [(t, _name_pattern(t)) for t in types]
+        self.states = [(s, _name_pattern(s, whole_word=True)) for s in states]
+        self.intents = LRUCache(max_entries=cache_size)
+
+    def parse(self, question):
+        text = normalize_question(question)
+        return self.intents.get_or_build(text, lambda: self._parse(text))
+
+    def _parse(self, text):
+        tokens = re.findall(r"\w+", text)
+        types = tuple(t for t, pattern in self.types if pattern.search(text))
+        states = tuple(s for s, pattern in self.states if pattern.search(text))
+        years = _years(text)
+
+        metric = next((m for m, stems in METRIC_WORDS.items() if _has_word(tokens, stems)), None)
+
+        group = None
+        if "where" in tokens:
+            group = "State"
+        elif "when" in tokens or _has_word(tokens, ["trend", "yearly", "annual"]):
+            group = "Year"
+        elif _has_word(tokens, RANK_WORDS):
+            group = next((g for g, stems in GROUP_WORDS.items() if _has_word(tokens, stems)), None)
+
+        return {
+            "types": types,
+            "states": states,
+            "years": years,
+            "metric": metric or "Events",
+            "group": group,
+            "understood": bool(types or states or years or metric or group)
+        }
+
+
+# ======================================================
+# ANSWERS
+# ======================================================
+def resolve_years(years, first, last):
+    # Parsed year spec → the "All" / year / (start, end) filter of the app
+    if years is None:
+        return "All"
+    if years[0] == "last":
+        lo, hi = last - years[1] + 1, last
+    else:
+        lo = first if years[0] is None else years[0]
+        hi = last if years[1] is None else years[1]
+    if lo <= first and hi >= last:
+        return "All"
+    return lo if lo == hi else (lo, hi)
+
+
+def answer_question(data, intent):
+    # Answered from the analytics cube: type and state filters keep whole
+    # cube cells and years are a range over the prefix sums, so no event
+    # rows are touched whatever the dataset size
+    years = data.filter_index.years
+    year = resolve_years(intent["years"], years[0], years[-1]) if years else "All"
+    where = tuple(
+        (column, values)
+        for column, values in (("Disaster_Type", intent["types"]), ("State", intent["states"]))
+        if values
+    )
+    stats = data.stats(year, "All", where=where)
+    metric = intent["metric"]
+
+    answer = {
+        "types": intent["types"],
+        "states": intent["states"],
+        "year": year,
+        "first_year": years[0] if years else None,
+        "last_year": years[-1] if years else None,
+        "metric": metric,
+        "group": intent["group"],
+        "events": stats.events,
+        "value": _metric_value(stats, metric),
+        "ranking": []
+    }
+
+    if intent["group"] is not None and not stats.empty:
+        totals = stats.total(intent["group"], metric)
+        if metric == "Risk_Score":
+            totals = (totals / stats.total(intent["group"], "Events")).round(2)
+        top = totals.sort_values(ascending=False, kind="stable").head(TOP_N)
+        answer["ranking"] = [(_plain(k), _plain(v)) for k, v in top.items()]
+    return answer
+
+
+def _metric_value(stats, metric):
+    return {
+        "Events": stats.events,
+        "Deaths": stats.deaths,
+        "Affected_Population": stats.affected,
+        "Risk_Score": stats.avg_risk
+    }[metric]
+
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def _format(value):
+    return f"{value:,}" if isinstance(value, int) else f"{value:,.2f}"
+
+
+def render_answer(answer, labels):
+    # Markdown in the UI language; labels is the app's LANG entry
+    def label(key, default):
+        return labels.get(key, default)
+
+    if answer["events"] == 0:
+        return label("no_data", "No data available for selected filters")
+
+    if answer["year"] == "All":
+        year_text = f"{answer['first_year']}–{answer['last_year']}"
+    elif isinstance(answer["year"], tuple):
+        year_text = f"{answer['year'][0]}–{answer['year'][1]}"
+    else:
+        year_text = str(answer["year"])
+    scope = " · ".join(
+        part for part in (", ".join(answer["types"]), ", ".join(answer["states"]) or "India", year_text)
+        if part
+    )
+    metric_label = label(*METRIC_LABELS[answer["metric"]])
+
+    if answer["ranking"]:
+        lines = [f"{scope}  ", f"**{metric_label}** · {label(*GROUP_LABELS[answer['group']])}", ""]
+        lines += [f"{i}. {key} — {_format(value)}" for i, (key, value) in enumerate(answer["ranking"], 1)]
+        return "\n".join(lines)
+
+    lines = [f"{scope}  ", f"**{metric_label}**: {_format(answer['value'])}  "]
+    if answer["metric"] != "Events":
+        lines.append(f"**{label('events', 'Events')}**: {answer['events']:,}")
+    return "\n".join(lines)
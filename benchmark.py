@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import process_emdat
+from aggregates import AnalyticsCube
+from data_loader import EventFeatures, geojson_to_df, load_events, write_sidecar, source_stat
+from indexes import FilterIndex, take_rows
+from map_layers import render_map_html
+
+# ======================================================
+# CONFIG
+# ======================================================
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = Path("bench_results")
+
+# Map HTML is only built while the selection stays below these sizes
+MAP_MODE_LIMITS = {"markers": 10_000, "fast_cluster": 200_000, "geojson": 200_000}
+
+
+# ======================================================
+# STAGE TIMER
+# ======================================================
+class StageRunner:
+    # Times one pipeline stage at a time and, when enabled, records the
+    # tracemalloc peak of allocations made inside it (numpy included).
+
+    def __init__(self, events, trace_memory=True):
+        self.events = events
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def run(self, stage, fn, repeat=1, items=None):
+        if self.trace_memory:
+            tracemalloc.start()
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            out = fn()
+        seconds = (time.perf_counter() - t0) / repeat
+
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        items = self.events if items is None else items
+        self.results.append({
+            "events": self.events,
+            "stage": stage,
+            "seconds": seconds,
+            "items": items,
+            "items_per_sec": items / seconds if seconds > 0 else None,
+            "peak_mb": round(peak / 1e6, 2) if peak is not None else None
+        })
+        print(
+            f"{self.events:>10,} {stage:<24} {seconds * 1000:10.2f} ms"
+            + (f" {peak / 1e6:10.1f} MB" if peak is not None else "")
+        )
+        return out
+
+
+# ======================================================
+# PIPELINE
+# ======================================================
+def bench_size(n_events, workdir, seed, workers, minify, trace_memory):
+    runner = StageRunner(n_events, trace_memory)
+    path = workdir / f"events_{n_events}.geojson"
+
+    runner.run("generate", lambda: process_emdat.save_dataset(
+        path, seed=seed, events=n_events, workers=workers, minify=minify
+    ))
+
+    # ---- Load ----
+    def load_geojson():
+        with open(path, "r") as f:
+            return json.load(f)
+
+    geojson = runner.run("load_geojson", load_geojson)
+    df = runner.run("geojson_to_df", lambda: geojson_to_df(geojson))
+    del geojson
+
+    source = source_stat(path)
+    source["blake2b"] = "benchmark"
+    runner.run("sidecar_write", lambda: write_sidecar(df, path, source))
+    df = runner.run("sidecar_load", lambda: load_events(path))
+
+    # ---- Filters ----
+    index = runner.run("filter_index_build", lambda: FilterIndex(df))
+    selections = [("All", "All")] + [
+        (y, t) for y in index.years for t in ["All"] + index.types
+    ] + [("All", t) for t in index.types]
+
+    def select_all():
+        for y, t in selections:
+            take_rows(df, index.select(y, t))
+
+    runner.run("filter_select", select_all, items=len(selections))
+
+    # Typical selection: one year, all types
+    year = index.years[len(index.years) // 2]
+    filtered_df = take_rows(df, index.select(year, "All"))
+
+    # ---- Map ----
+    features = EventFeatures(df)
+    geo = runner.run(
+        "filter_geo",
+        lambda: features.take(filtered_df["Feature_Index"].to_numpy()),
+        items=len(filtered_df)
+    )
+    for mode, limit in MAP_MODE_LIMITS.items():
+        if len(geo) <= limit:
+            runner.run(f"map_{mode}", lambda: render_map_html(geo, mode), items=len(geo))
+
+    # ---- Analytics ----
+    cube = runner.run("cube_build", lambda: AnalyticsCube(df))
+
+    def rollup_all():
+        for y, t in selections:
+            view = cube.rollup(y, t)
+            view.counts("Risk_Level")
+            view.counts("Disaster_Type")
+            view.yearly_events()
+            view.top_states(10)
+            view.dominant("Risk_Level")
+
+    runner.run("analytics_rollup", rollup_all, items=len(selections))
+
+    def groupby_filtered():
+        filtered_df["Risk_Level"].value_counts()
+        filtered_df["Disaster_Type"].value_counts()
+        filtered_df.groupby("Year").size()
+        filtered_df.groupby("State")["Affected_Population"].sum().nlargest(10)
+
+    runner.run("analytics_groupby", groupby_filtered, items=len(filtered_df))
+
+    return runner.results
+
+
+# ======================================================
+# REPORTING
+# ======================================================
+def compare(current, baseline_path):
+    # Ratio of current / baseline seconds per (events, stage)
+    with open(baseline_path) as f:
+        baseline = {
+            (r["events"], r["stage"]): r["seconds"]
+            for r in json.load(f)["results"]
+        }
+
+    print(f"\nCompared with {baseline_path} (ratio > 1 is slower):")
+    for r in current:
+        old = baseline.get((r["events"], r["stage"]))
+        if old:
+            ratio = r["seconds"] / old
+            flag = "  ⚠️" if ratio > 1.2 else ""
+            print(f"{r['events']:>10,} {r['stage']:<24} {ratio:6.2f}×{flag}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark load → filter → map → analytics")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="event counts to generate (e.g. 1000 ... 10000000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--minify", action="store_true", help="benchmark minified GeoJSON")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="skip tracemalloc (faster, no per-stage peak memory)")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results JSON")
+    parser.add_argument("--keep", action="store_true", help="keep generated datasets")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="disaster_bench_"))
+
+    results = []
+    try:
+        for n in args.sizes:
+            results += bench_size(
+                n, workdir, args.seed, args.workers, args.minify,
+                trace_memory=not args.no_trace_memory
+            )
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    started = datetime.now(timezone.utc)
+    report = {
+        "meta": {
+            "timestamp": started.isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "minify": args.minify,
+            "trace_memory": not args.no_trace_memory,
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        },
+        "results": results
+    }
+
+    out = args.output or RESULTS_DIR / f"bench_{started:%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved to: {out}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,110 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# ======================================================
+# BOUNDED LRU CACHE
+# ======================================================
+# Shared by every Streamlit session in the process, so all access goes
+# through a lock. Bounded by entry count and, optionally, by total size.
+# A value bigger than the whole size budget is handed back uncached rather
+# than flushing every other entry to make room for it.
+# on_evict(key, value) runs after an entry is dropped, outside the lock.
+
+
+class LRUCache:
+
+    def __init__(self, max_entries=32, max_bytes=None, sizeof=sys.getsizeof, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncached = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        # Returns whether the value was cached
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key)
+                del self._data[key]
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                self.uncached += 1
+                return False
+
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            evicted = self._evict()
+
+        if self.on_evict is not None:
+            for old_key, old_value in evicted:
+                self.on_evict(old_key, old_value)
+        return True
+
+    def get_or_build(self, key, build):
+        # build() runs outside the lock so a slow build never blocks
+        # readers of other keys; concurrent misses may build twice.
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        evicted = []
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, value = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+            self.evictions += 1
+            evicted.append((key, value))
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "uncached": self.uncached,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
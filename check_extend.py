@@ -0,0 +1,319 @@
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregates import TREND_MODES
+from data_loader import CATEGORY_COLUMNS, GEOJSON_PATH, geojson_to_df, load_events
+from dataset import QUARANTINE_SUFFIX, Dataset, DatasetStore, append_segment
+from indexes import tokenize
+
+# ======================================================
+# CONFIG
+# ======================================================
+# python check_extend.py [--data events.geojson] [--deltas 3] [--queries 300]
+#
+# Replays a dataset as a base snapshot plus appended deltas through
+# Dataset.extend() and checks that every query answers exactly as on a
+# Dataset built from scratch over the same rows. Then feeds a DatasetStore
+# malformed segments, at startup and while polling, and checks they are
+# quarantined without losing the good ones.
+
+DEFAULT_DELTAS = 3
+DEFAULT_QUERIES = 300
+
+# Row orders the log is replayed in: file order, and sorted by state so
+# later deltas bring states (new bitmaps, new search terms) the base never saw
+ORDERS = ["file", "state"]
+
+SORT_COLUMNS = ["Year", "Deaths", "Affected_Population", "Risk_Score", "State", "Event_Name"]
+TABLE_PAGE = 50
+RADII_KM = [50, 150, 500]
+ZOOMS = [3, 7, 12]
+
+# Multi-value filters drawn for `where`
+WHERE_COLUMNS = ["Year", "Disaster_Type", "State", "Risk_Level", "Source"]
+
+
+# ======================================================
+# REPLAY
+# ======================================================
+def split_log(df, n_deltas):
+    # Base frame and deltas. Each part keeps only the categories it uses,
+    # like a freshly read segment, so extend() has to merge categories.
+    bounds = np.linspace(0, len(df), n_deltas + 2).astype(int)
+    parts = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        part = df.iloc[start:end].copy()
+        for col in CATEGORY_COLUMNS:
+            part[col] = part[col].cat.remove_unused_categories()
+        parts.append(part)
+    return parts
+
+
+def warm(data):
+    # Build every lazy index and sort order so extend() carries them over
+    # instead of rebuilding them from the merged frame
+    data.cluster_index
+    data.spatial_index
+    data.text_index
+    for column in SORT_COLUMNS:
+        data.sort_index.rank(column)
+
+
+def replay(df, n_deltas):
+    parts = split_log(df, n_deltas)
+    data = Dataset(parts[0].reset_index(drop=True), "base")
+    warm(data)
+    for i, delta in enumerate(parts[1:], 1):
+        data = data.extend(delta, f"delta-{i}")
+    return data
+
+
+# ======================================================
+# QUERIES
+# ======================================================
+def random_queries(df, n, rng):
+    years = sorted(df["Year"].unique().tolist())
+    types = df["Disaster_Type"].cat.categories.tolist()
+    states = df["State"].cat.categories.tolist()
+    words = sorted({
+        token
+        for text in df["Event_Name"].sample(min(len(df), 200), random_state=0).tolist()
+                    + states + df["Source"].cat.categories.tolist()
+        for token in tokenize(text)
+    })
+
+    def pick(values, k=1):
+        return [values[i] for i in rng.choice(len(values), size=min(k, len(values)), replace=False)]
+
+    queries = []
+    for _ in range(n):
+        q = {}
+        r = rng.random()
+        if r < 0.3:
+            q["year"] = pick(years)[0]
+        elif r < 0.6:
+            q["year"] = tuple(sorted(pick(years, 2)))
+        if rng.random() < 0.4:
+            q["disaster_type"] = pick(types)[0]
+        if rng.random() < 0.5:
+            columns = pick(WHERE_COLUMNS, int(rng.integers(1, 3)))
+            q["where"] = tuple(
+                (column, tuple(sorted(pick(
+                    years if column == "Year" else df[column].cat.categories.tolist(),
+                    int(rng.integers(1, 4))
+                ))))
+                for column in sorted(columns)
+            )
+        r = rng.random()
+        if r < 0.3:
+            q["search"] = " ".join(pick(words, int(rng.integers(1, 3))))
+        elif r < 0.4:
+            word = pick(words)[0]
+            q["search"] = word[:max(1, len(word) // 2)]
+        elif r < 0.45:
+            q["search"] = "zzzz"
+        if rng.random() < 0.2:
+            q["near"] = pick(states)[0]
+            q["radius_km"] = pick(RADII_KM)[0]
+        queries.append(q)
+    return queries
+
+
+# ======================================================
+# COMPARISON
+# ======================================================
+def frames_equal(a, b):
+    try:
+        pd.testing.assert_frame_equal(
+            a.reset_index(drop=True), b.reset_index(drop=True),
+            check_dtype=False, check_categorical=False
+        )
+        return True
+    except AssertionError:
+        return False
+
+
+def compare_stats(extended, fresh):
+    # (check name, equal?) for one pair of cube views
+    checks = [
+        ("stats.totals", (extended.events, extended.deaths, extended.affected, extended.avg_risk)
+         == (fresh.events, fresh.deaths, fresh.affected, fresh.avg_risk)),
+        ("stats.top_states", frames_equal(extended.top_states(10), fresh.top_states(10)))
+    ]
+    if not fresh.empty:
+        for mode in TREND_MODES:
+            for measure in ("Events", "Deaths"):
+                checks.append((
+                    f"stats.trend.{mode}",
+                    frames_equal(extended.trend(mode, 3, measure), fresh.trend(mode, 3, measure))
+                ))
+        for dimension in ("Risk_Level", "Disaster_Type"):
+            checks.append((f"stats.counts.{dimension}", frames_equal(extended.counts(dimension), fresh.counts(dimension))))
+            checks.append((f"stats.dominant.{dimension}", extended.dominant(dimension) == fresh.dominant(dimension)))
+    return checks
+
+
+def compare_query(extended, fresh, q, rng):
+    rows = extended.select(**q)
+    expected = fresh.select(**q)
+    checks = [("select", np.array_equal(rows, expected))]
+    checks += compare_stats(extended.stats(**q), fresh.stats(**q))
+
+    column = SORT_COLUMNS[int(rng.integers(len(SORT_COLUMNS)))]
+    for ascending in (True, False):
+        checks.append((
+            "sort_index.page",
+            np.array_equal(
+                extended.sort_index.page(expected, column, ascending, 0, TABLE_PAGE),
+                fresh.sort_index.page(expected, column, ascending, 0, TABLE_PAGE)
+            )
+        ))
+
+    if len(expected):
+        zoom = ZOOMS[int(rng.integers(len(ZOOMS)))]
+        checks.append((
+            "cluster_index.buckets",
+            frames_equal(extended.cluster_index.buckets(expected, zoom), fresh.cluster_index.buckets(expected, zoom))
+        ))
+    return checks
+
+
+def compare_snapshots(extended, fresh, queries, rng):
+    # {check: [passed, failed]} and the first failing queries
+    results = {}
+    failures = []
+
+    def record(name, ok, q):
+        counts = results.setdefault(name, [0, 0])
+        counts[0 if ok else 1] += 1
+        if not ok and len(failures) < 10:
+            failures.append((name, q))
+
+    record("len", len(extended) == len(fresh), None)
+    record("filter_index.years", list(extended.filter_index.years) == list(fresh.filter_index.years), None)
+    for column in CATEGORY_COLUMNS:
+        record("values", extended.values(column) == fresh.values(column), column)
+
+    for q in queries:
+        for name, ok in compare_query(extended, fresh, q, rng):
+            record(name, ok, q)
+
+    lat, lon = fresh.df["Lat"].to_numpy(), fresh.df["Lon"].to_numpy()
+    for _ in range(len(queries) // 10 + 1):
+        south, north = np.sort(rng.uniform(lat.min() - 1, lat.max() + 1, 2))
+        west, east = np.sort(rng.uniform(lon.min() - 1, lon.max() + 1, 2))
+        box = (south, west, north, east)
+        record("spatial_index.bbox",
+               np.array_equal(extended.spatial_index.bbox(*box), fresh.spatial_index.bbox(*box)), box)
+
+    return results, failures
+
+
+# ======================================================
+# MALFORMED SEGMENTS
+# ======================================================
+def check_bad_segments(path):
+    # {check: [passed, failed]} and the failing checks, like compare_snapshots
+    with open(path, "r", encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    results = {}
+    failures = []
+
+    def record(name, ok):
+        results.setdefault(name, [0, 0])[0 if ok else 1] += 1
+        if not ok:
+            failures.append((name, None))
+
+    def append_bad(rows, garbage):
+        segment = append_segment(rows, base)
+        with open(segment, "a", encoding="utf-8") as f:
+            f.write(garbage + "\n")
+        return segment
+
+    n = len(features) // 4
+    missing_year = [{**features[0], "properties": {k: v for k, v in features[0]["properties"].items() if k != "year"}}]
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.geojson"
+        with open(base, "w", encoding="utf-8") as f:
+            json.dump({"type": "FeatureCollection", "features": features[:n]}, f)
+
+        # Present at startup: one good segment, one cut-off line
+        append_segment(features[n:2 * n], base)
+        bad = [append_bad(features[2 * n:2 * n + 5], '{"type": "Feature", "geom')]
+        store = DatasetStore(base, poll_seconds=0)
+        record("startup skips bad segments", len(store.current()) == 2 * n)
+
+        # Appended while running: a feature without a year, then good data
+        bad.append(append_segment(missing_year, base))
+        bad.append(append_bad(features[:1], "not json"))
+        append_segment(features[2 * n:3 * n], base)
+        store.current()
+        record("polling skips bad segments", len(store.current()) == 3 * n)
+        record("bad segments quarantined", all(
+            not s.exists() and s.with_name(s.name + QUARANTINE_SUFFIX).exists() for s in bad
+        ))
+
+        # New segments never reuse a quarantined number
+        last = append_segment(features[3 * n:], base)
+        data = store.current()
+        record("quarantined numbers not reused", int(last.stem) > max(int(s.stem) for s in bad))
+        record("segments after quarantine load", len(data) == len(features))
+        record("feature index continuous", list(data.df["Feature_Index"]) == list(range(len(data))))
+
+        fresh = Dataset(geojson_to_df({"features": features}), "fresh")
+        rng = np.random.default_rng(0)
+        same, _ = compare_snapshots(data, fresh, random_queries(fresh.df, 50, rng), rng)
+        record("matches a fresh build", not any(errors for _, errors in same.values()))
+
+    return results, failures
+
+
+def report(title, results, failures):
+    print(title)
+    for name, (passed, errors) in sorted(results.items()):
+        print(f"   {'✅' if not errors else '❌'} {name}: {passed} ok" + (f", {errors} differ" if errors else ""))
+    for name, q in failures:
+        print(f"   first mismatch in {name}: {q}")
+    return bool(failures)
+
+
+# ======================================================
+# MAIN
+# ======================================================
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check extended snapshots against a fresh build")
+    parser.add_argument("--data", default=GEOJSON_PATH, help="GeoJSON dataset to replay")
+    parser.add_argument("--deltas", type=int, default=DEFAULT_DELTAS, help="deltas appended to the base")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="random queries per order")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    df = load_events(args.data)
+    failed = False
+
+    for order in ORDERS:
+        log = df.sort_values("State", kind="stable") if order == "state" else df
+        log = log.reset_index(drop=True)
+        rng = np.random.default_rng(args.seed)
+
+        extended = replay(log, args.deltas)
+        fresh = Dataset(log, "fresh")
+        queries = random_queries(log, args.queries, rng)
+        results, failures = compare_snapshots(extended, fresh, queries, rng)
+
+        title = f"🔁 {order} order: {len(log):,} events as a base + {args.deltas} deltas, {len(queries)} queries"
+        failed |= report(title, results, failures)
+
+    results, failures = check_bad_segments(args.data)
+    failed |= report("🧪 malformed segments", results, failures)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,354 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# ======================================================
+# CONFIG
+# ======================================================
+GEOJSON_PATH = Path("data/new_original_india_disasters_synthetic_verified.geojson")
+
+# Columnar sidecar written next to the GeoJSON, e.g.
+# data/<name>.geojson.columns.npz
+SIDECAR_SUFFIX = ".columns.npz"
+SIDECAR_VERSION = 3
+HASH_CHUNK_SIZE = 1 << 20
+
+# Columns shown in the records table (same order as before)
+EVENT_COLUMNS = [
+    "Year",
+    "Disaster_Type",
+    "State",
+    "Deaths",
+    "Affected_Population",
+    "Risk_Score",
+    "Risk_Level",
+    "Event_Name",
+    "Source"
+]
+
+# Point coordinates, needed to rebuild map features without the GeoJSON
+COORD_COLUMNS = ["Lon", "Lat"]
+
+STRING_COLUMNS = ["Disaster_Type", "State", "Risk_Level", "Event_Name", "Source"]
+
+# Compact in-memory schema. Low-cardinality strings are categoricals;
+# Event_Name is close to unique per event, so a dictionary would only add
+# codes and it stays a plain string column.
+CATEGORY_COLUMNS = ["Disaster_Type", "State", "Risk_Level", "Source"]
+# Stored in the narrowest of these that holds every value
+INT_COLUMNS = ["Year", "Deaths", "Affected_Population"]
+INT_DTYPES = [np.int16, np.int32, np.int64]
+# Source risk scores have two decimals, well inside float32 precision
+FLOAT32_COLUMNS = ["Risk_Score"]
+RISK_SCORE_DECIMALS = 2
+
+
+# ======================================================
+# GEOJSON → DATAFRAME
+# ======================================================
+def geojson_to_df(geojson, compact=True):
+    # Fill each column in one pass over the feature list instead of
+    # building a dict per row.
+    features = geojson["features"]
+    props = [f["properties"] for f in features]
+    n = len(features)
+
+    coords = np.array(
+        [f["geometry"]["coordinates"][:2] for f in features],
+        dtype=np.float64
+    ).reshape(n, 2)
+
+    columns = {
+        "Year": np.fromiter((p["year"] for p in props), dtype=np.int64, count=n),
+        "Disaster_Type": [p["disaster_type"] for p in props],
+        "State": [p.get("state", "Unknown") for p in props],
+        "Deaths": np.fromiter((p.get("Deaths", 0) for p in props), dtype=np.int64, count=n),
+        "Affected_Population": np.fromiter(
+            (p.get("Affected_Population", 0) for p in props), dtype=np.int64, count=n
+        ),
+        "Risk_Score": np.fromiter((p.get("Risk_Score", 0) for p in props), dtype=np.float64, count=n),
+        "Risk_Level": [p.get("incident_level", "Unknown") for p in props],
+        "Event_Name": [p.get("event_name", "") for p in props],
+        "Source": [p.get("source", "") for p in props],
+        "Lon": coords[:, 0],
+        "Lat": coords[:, 1],
+        "Feature_Index": np.arange(n, dtype=np.int64)
+    }
+    df = pd.DataFrame(columns, columns=EVENT_COLUMNS + COORD_COLUMNS + ["Feature_Index"])
+    return compact_events(df) if compact else df
+
+
+# ======================================================
+# COMPACT SCHEMA
+# ======================================================
+def narrow_int_dtype(values):
+    if len(values) == 0:
+        return INT_DTYPES[0]
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return INT_DTYPES[-1]
+
+
+def compact_events(df):
+    dtypes = {}
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            dtypes[col] = "category"
+        elif col in INT_COLUMNS:
+            dtypes[col] = narrow_int_dtype(df[col])
+        elif col in FLOAT32_COLUMNS:
+            dtypes[col] = np.float32
+    return df.astype(dtypes)
+
+
+def concat_events(frames):
+    # pd.concat turns categoricals with different categories back into
+    # strings, so give every frame the sorted union of categories first
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+
+    unified = {}
+    for col in CATEGORY_COLUMNS:
+        if col in frames[0].columns:
+            unified[col] = union_categoricals([f[col] for f in frames], sort_categories=True).categories
+    frames = [
+        f.assign(**{col: f[col].cat.set_categories(cats) for col, cats in unified.items()})
+        for f in frames
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def risk_scores(values):
+    # float32 storage back to the source's two-decimal values for output
+    return np.round(np.asarray(values, dtype=np.float64), RISK_SCORE_DECIMALS)
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def wide_events(df):
+    # The original layout (64-bit numbers, plain strings), for comparison
+    return df.astype({
+        col: "str" if col in STRING_COLUMNS
+        else np.float64 if df[col].dtype.kind == "f"
+        else np.int64
+        for col in df.columns
+    })
+
+
+# ======================================================
+# DATAFRAME → MAP FEATURES (LAZY)
+# ======================================================
+class EventFeatures:
+    # Sequence of GeoJSON features backed by the event columns.
+    # Features are only materialised when indexed, so loading the
+    # dataset never pays a per-event Python cost.
+
+    def __init__(self, df):
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    def __getitem__(self, i):
+        return self.take([i])[0]
+
+    def __iter__(self):
+        return iter(self.take(np.arange(len(self))))
+
+    def take(self, row_ids):
+        # Slice each column once for the requested rows, then zip them into
+        # features: cost is O(len(row_ids)), independent of the dataset size.
+        rows = self.df.iloc[np.asarray(row_ids, dtype=np.int64)]
+        cols = [
+            risk_scores(rows[c]).tolist() if c == "Risk_Score" else rows[c].tolist()
+            for c in (
+                "Lon", "Lat", "State", "Event_Name", "Year", "Disaster_Type",
+                "Risk_Level", "Deaths", "Affected_Population", "Risk_Score", "Source"
+            )
+        ]
+        return [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [lon, lat]
+                },
+                "properties": {
+                    "state": state,
+                    "event_name": name,
+                    "year": year,
+                    "disaster_type": dtype,
+                    "incident_level": level,
+                    "Deaths": deaths,
+                    "Affected_Population": affected,
+                    "Risk_Score": score,
+                    "source": source
+                }
+            }
+            for lon, lat, state, name, year, dtype, level, deaths, affected, score, source
+            in zip(*cols)
+        ]
+
+
+# ======================================================
+# SOURCE FINGERPRINT
+# ======================================================
+def source_stat(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ======================================================
+# COLUMNAR SIDECAR (.npz)
+# ======================================================
+def sidecar_path(path):
+    path = Path(path)
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def write_sidecar(df, path, source):
+    # String columns are dictionary-encoded (codes + unique values) so the
+    # file holds only fixed-width numpy arrays and loads without pickle.
+    # Categoricals are written as their own codes and categories.
+    arrays = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            arrays[f"{col}__codes"] = df[col].cat.codes.to_numpy()
+            arrays[f"{col}__values"] = np.asarray(df[col].cat.categories, dtype=str)
+        elif col in STRING_COLUMNS:
+            codes, uniques = pd.factorize(df[col])
+            arrays[f"{col}__codes"] = codes.astype(np.int32)
+            arrays[f"{col}__values"] = np.asarray(uniques, dtype=str)
+        else:
+            arrays[col] = df[col].to_numpy()
+
+    meta = {
+        "version": SIDECAR_VERSION,
+        "columns": list(df.columns),
+        "rows": len(df),
+        "source": source
+    }
+    arrays["__meta__"] = np.array(json.dumps(meta))
+
+    out = sidecar_path(path)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, out)
+    return out
+
+
+def read_sidecar(path):
+    out = sidecar_path(path)
+    if not out.exists():
+        return None, None
+
+    try:
+        with np.load(out, allow_pickle=False) as data:
+            meta = json.loads(str(data["__meta__"]))
+            if meta.get("version") != SIDECAR_VERSION:
+                return None, None
+
+            columns = {}
+            for col in meta["columns"]:
+                if col in CATEGORY_COLUMNS:
+                    # No per-row string decoding at all
+                    columns[col] = pd.Categorical.from_codes(
+                        data[f"{col}__codes"], categories=data[f"{col}__values"]
+                    )
+                elif col in STRING_COLUMNS:
+                    values = data[f"{col}__values"]
+                    columns[col] = values[data[f"{col}__codes"]]
+                else:
+                    columns[col] = data[col]
+    except (OSError, ValueError, KeyError):
+        # Truncated or foreign file: treat as missing and rebuild
+        return None, None
+
+    return meta, pd.DataFrame(columns, columns=meta["columns"])
+
+
+def sidecar_is_fresh(meta, path):
+    # Cheap size/mtime check first; only hash the source when the size
+    # matches but the mtime moved (copied or touched file).
+    current = source_stat(path)
+    cached = meta["source"]
+
+    if current["size"] != cached["size"]:
+        return False, current
+    if current["mtime_ns"] == cached["mtime_ns"]:
+        return True, current
+
+    current["blake2b"] = file_hash(path)
+    return current["blake2b"] == cached["blake2b"], current
+
+
+def build_sidecar(path=GEOJSON_PATH):
+    # Stat before reading so a concurrent rewrite invalidates the sidecar
+    source = source_stat(path)
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    source["blake2b"] = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    df = geojson_to_df(json.loads(raw))
+    del raw
+
+    write_sidecar(df, path, source)
+    df.attrs["dataset_version"] = source["blake2b"]
+    return df
+
+
+def load_events(path=GEOJSON_PATH):
+    # Load the event DataFrame from the sidecar when it still matches the
+    # GeoJSON, otherwise re-parse the GeoJSON and refresh the sidecar.
+    meta, df = read_sidecar(path)
+
+    if meta is not None:
+        fresh, current = sidecar_is_fresh(meta, path)
+        if fresh:
+            if current["mtime_ns"] != meta["source"]["mtime_ns"]:
+                # Same content, new mtime: record it to skip hashing next time
+                write_sidecar(df, path, current)
+            df.attrs["dataset_version"] = meta["source"]["blake2b"]
+            return df
+
+    return build_sidecar(path)
+
+
+def dataset_version(df):
+    # Content hash of the source GeoJSON; changes whenever the data does
+    return df.attrs.get("dataset_version", "unknown")
+
+
+# ======================================================
+# BUILD STEP
+# ======================================================
+if __name__ == "__main__":
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else GEOJSON_PATH
+    events = build_sidecar(src)
+
+    print("✅ Columnar sidecar built successfully")
+    print(f"📊 Total events: {len(events)}")
+    print(f"🧮 Memory: {memory_mb(wide_events(events)):.2f} MB wide → {memory_mb(events):.2f} MB compact")
+    print(f"💾 Saved to: {sidecar_path(src)}")
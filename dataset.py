@@ -0,0 +1,354 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregates import CUBE_DIMENSIONS, AnalyticsCube
+from data_loader import GEOJSON_PATH, EventFeatures, concat_events, dataset_version, geojson_to_df, load_events, source_stat
+from memory_usage import dataset_nbytes
+from indexes import BitmapIndex, ClusterIndex, FilterIndex, SortIndex, SpatialIndex, TextIndex, intersect_rows, take_rows, tokenize
+
+# ======================================================
+# CONFIG
+# ======================================================
+# New events are appended as NDJSON segments (one GeoJSON feature per line)
+# in a directory next to the base file, e.g.
+# data/<name>.geojson.segments/0000000001.ndjson
+SEGMENT_SUFFIX = ".segments"
+SEGMENT_GLOB = "*.ndjson"
+
+# A segment that cannot be parsed is renamed with this suffix and skipped
+QUARANTINE_SUFFIX = ".bad"
+
+# How often a running process looks for new segments
+INGEST_POLL_SECONDS = 2.0
+
+log = logging.getLogger(__name__)
+
+
+# ======================================================
+# SEGMENT LOG
+# ======================================================
+def segment_dir(path=GEOJSON_PATH):
+    path = Path(path)
+    return path.with_name(path.name + SEGMENT_SUFFIX)
+
+
+def list_segments(path=GEOJSON_PATH):
+    # Segment names are zero-padded sequence numbers, so name order is
+    # append order. Files still being written end in .tmp and are skipped.
+    directory = segment_dir(path)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(SEGMENT_GLOB))
+
+
+def append_segment(features, path=GEOJSON_PATH):
+    # Write one new segment. The file only appears under its final name once
+    # it is complete, and os.link never replaces an existing segment, so
+    # concurrent writers just take the next sequence number.
+    directory = segment_dir(path)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    tmp = directory / f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for feature in features:
+            f.write(json.dumps(feature, ensure_ascii=False) + "\n")
+
+    try:
+        while True:
+            # Quarantined segments keep their number, so it is never reused
+            # for a segment a running store would take as already applied
+            existing = list_segments(path) + sorted(directory.glob(SEGMENT_GLOB + QUARANTINE_SUFFIX))
+            seq = max((int(s.name.split(".")[0]) for s in existing), default=0) + 1
+            target = directory / f"{seq:010d}.ndjson"
+            try:
+                os.link(tmp, target)
+                return target
+            except FileExistsError:
+                continue
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def read_segment(segment):
+    with open(segment, "r", encoding="utf-8") as f:
+        features = [json.loads(line) for line in f if line.strip()]
+    return geojson_to_df({"features": features})
+
+
+def quarantine_segment(segment, error):
+    # Move a bad segment out of the log so no poll or restart trips on it
+    # again; if it cannot be moved, callers still mark it applied
+    target = segment.with_name(segment.name + QUARANTINE_SUFFIX)
+    try:
+        os.replace(segment, target)
+    except OSError:
+        target = segment
+    log.error("skipped unreadable segment %s (%s: %s), left at %s",
+              segment.name, type(error).__name__, error, target)
+
+
+def read_segments(segments, offset):
+    # Parse segments into one event frame whose Feature_Index continues
+    # after the `offset` rows already loaded. Each segment is parsed on its
+    # own: one that fails (bad JSON, missing fields) is quarantined and the
+    # others still load.
+    frames = []
+    for segment in segments:
+        try:
+            frames.append(read_segment(segment))
+        except Exception as e:
+            quarantine_segment(Path(segment), e)
+
+    delta = concat_events(frames) if frames else geojson_to_df({"features": []})
+    delta["Feature_Index"] = np.arange(offset, offset + len(delta), dtype=np.int64)
+    return delta
+
+
+# ======================================================
+# DATASET SNAPSHOT
+# ======================================================
+class Dataset:
+    # Events plus everything derived from them, for one point in the log.
+    # Never modified after construction: extend() returns a new snapshot, so
+    # a rerun that already holds one keeps a consistent view while another
+    # session picks up new segments. One snapshot is shared by every session;
+    # index arrays are made read-only and the frame is copy-on-write, so a
+    # session can only ever hold row ids or views into it.
+
+    def __init__(self, df, version, filter_index=None, cube=None, centres=None,
+                 cluster_index=None, spatial_index=None, sort_index=None, bitmap_index=None,
+                 text_index=None):
+        self.df = df
+        self.version = version
+        self.features = EventFeatures(df)
+        self.filter_index = _freeze(filter_index if filter_index is not None else FilterIndex(df))
+        self.bitmap_index = _freeze(bitmap_index if bitmap_index is not None else BitmapIndex(df))
+        self.cube = cube if cube is not None else AnalyticsCube(df)
+        self.centres = centres if centres is not None else _state_centres(df)
+        self.places = {
+            state: (row.Lat / row.Events, row.Lon / row.Events)
+            for state, row in self.centres.iterrows()
+        }
+
+        # Only needed by some map modes / filters: built on first use
+        self._cluster_index = _freeze(cluster_index)
+        self._spatial_index = _freeze(spatial_index)
+        self._text_index = _freeze(text_index)
+        # Per-column orders are themselves built on first use
+        self.sort_index = sort_index if sort_index is not None else SortIndex(df)
+        self._lock = threading.Lock()
+        self._memory = None
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def cluster_index(self):
+        with self._lock:
+            if self._cluster_index is None:
+                self._cluster_index = _freeze(ClusterIndex(self.df))
+            return self._cluster_index
+
+    @property
+    def spatial_index(self):
+        with self._lock:
+            if self._spatial_index is None:
+                self._spatial_index = _freeze(SpatialIndex(self.df))
+            return self._spatial_index
+
+    @property
+    def text_index(self):
+        with self._lock:
+            if self._text_index is None:
+                self._text_index = _freeze(TextIndex(self.df))
+            return self._text_index
+
+    def memory(self):
+        # ({component: bytes}, ids of shared objects), recounted only after a
+        # lazy index (or sort order) has been built
+        built = (
+            self._cluster_index is not None,
+            self._spatial_index is not None,
+            self._text_index is not None,
+            tuple(self.sort_index.orders)
+        )
+        with self._lock:
+            if self._memory is None or self._memory[0] != built:
+                self._memory = (built, *dataset_nbytes(self))
+            return self._memory[1], self._memory[2]
+
+    def values(self, column):
+        # Distinct values of a filter column, sorted
+        values = self.df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.cat.categories.tolist()
+        return sorted(values.unique().tolist())
+
+    def select(self, year="All", disaster_type="All", near="All", radius_km=None, where=(), search=""):
+        # Row ids matching the filters, answered from the indexes. `where`
+        # holds multi-value filters as ((column, (value, ...)), ...) and
+        # `search` free text; both are combined as bitsets before decoding.
+        rows = self.filter_index.select(year, disaster_type)
+        words = self.bitmap_index.mask(dict(where)) if where else None
+        if tokenize(search):
+            found = self.text_index.mask(search, self.bitmap_index)
+            words = found if words is None else (words & found)
+        if words is not None:
+            matches = self.bitmap_index.rows(words)
+            rows = matches if len(rows) == len(self) else intersect_rows(rows, matches)
+        if near != "All":
+            lat0, lon0 = self.places[near]
+            rows = intersect_rows(rows, self.spatial_index.radius(lat0, lon0, radius_km))
+        return rows
+
+    def stats(self, year="All", disaster_type="All", near="All", radius_km=None, where=(), search="",
+              rows=None):
+        # Cube roll-up for the filters. Multi-value filters on cube dimensions
+        # keep whole cells; a radius, a Source filter or a text search cuts
+        # across cells, so those views are built from the selected rows.
+        if near == "All" and not tokenize(search) and all(column in CUBE_DIMENSIONS for column, _ in where):
+            cube = self.cube.subset(where) if where else self.cube
+            return cube.rollup(year, disaster_type)
+        if rows is None:
+            rows = self.select(year, disaster_type, near, radius_km, where, search)
+        return AnalyticsCube(take_rows(self.df, rows)).rollup()
+
+    def extend(self, delta, version):
+        # Indexes and aggregates absorb only the delta; the frame itself is
+        # one concatenation (a column copy, no re-parsing).
+        df = concat_events([self.df, delta])
+        df.attrs = dict(self.df.attrs)
+
+        with self._lock:
+            cluster_index = self._cluster_index
+            spatial_index = self._spatial_index
+            text_index = self._text_index
+
+        return Dataset(
+            df,
+            version,
+            filter_index=self.filter_index.extend(delta),
+            bitmap_index=self.bitmap_index.extend(delta),
+            cube=self.cube.extend(delta),
+            centres=self.centres.add(_state_centres(delta), fill_value=0),
+            cluster_index=cluster_index.extend(delta) if cluster_index is not None else None,
+            spatial_index=spatial_index.extend(delta) if spatial_index is not None else None,
+            text_index=text_index.extend(delta) if text_index is not None else None,
+            sort_index=self.sort_index.extend(df)
+        )
+
+
+def _freeze(index):
+    # Mark every array an index holds read-only
+    if index is None:
+        return None
+    values = list(vars(index).values())
+    while values:
+        value = values.pop()
+        if isinstance(value, dict):
+            values.extend(value.values())
+        elif isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return index
+
+
+def _state_centres(df):
+    # Per-state coordinate sums and counts; means are taken when reading so
+    # snapshots can be merged by addition
+    return df.groupby("State", observed=True).agg(
+        Lat=("Lat", "sum"),
+        Lon=("Lon", "sum"),
+        Events=("Lat", "size")
+    ).astype(np.float64)
+
+
+# ======================================================
+# LIVE STORE
+# ======================================================
+class DatasetStore:
+    # Holds the current snapshot for the process. current() looks for new
+    # segments at most every `poll_seconds` and merges just those; a changed
+    # base file (rewritten, not appended) triggers a full reload instead.
+
+    def __init__(self, path=GEOJSON_PATH, poll_seconds=INGEST_POLL_SECONDS):
+        self.path = Path(path)
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._reload()
+
+    def current(self):
+        if time.monotonic() - self._polled >= self.poll_seconds:
+            self.refresh()
+        return self._dataset
+
+    def refresh(self):
+        # Returns the number of events merged by this call
+        with self._lock:
+            self._polled = time.monotonic()
+
+            if source_stat(self.path) != self._base_stat:
+                before = len(self._dataset)
+                self._reload()
+                return len(self._dataset) - before
+
+            new = [s for s in list_segments(self.path) if s.name not in self._applied]
+            if not new:
+                return 0
+
+            delta = read_segments(new, offset=len(self._dataset))
+            self._applied.update(s.name for s in new)
+            if len(delta):
+                self._dataset = self._dataset.extend(delta, self._version(new[-1]))
+            return len(delta)
+
+    def _reload(self):
+        self._base_stat = source_stat(self.path)
+        df = load_events(self.path)
+        self._base_version = dataset_version(df)
+
+        segments = list_segments(self.path)
+        self._applied = {s.name for s in segments}
+        version = self._version(segments[-1] if segments else None)
+        if segments:
+            df = concat_events([df, read_segments(segments, offset=len(df))])
+            df.attrs["dataset_version"] = self._base_version
+
+        self._dataset = Dataset(df, version)
+        self._polled = time.monotonic()
+
+    def _version(self, last_segment):
+        # Segments are append-only, so base hash + last segment applied
+        # identifies the data
+        if last_segment is None:
+            return self._base_version
+        return f"{self._base_version}+{Path(last_segment).stem}"
+
+
+# ======================================================
+# APPEND FROM THE COMMAND LINE
+# ======================================================
+# python dataset.py new_events.ndjson   (or a GeoJSON FeatureCollection)
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python dataset.py <events.ndjson|events.geojson> [base.geojson]")
+
+    src = Path(sys.argv[1])
+    base = Path(sys.argv[2]) if len(sys.argv) > 2 else GEOJSON_PATH
+
+    with open(src, "r", encoding="utf-8") as f:
+        if src.suffix == ".ndjson":
+            new_features = [json.loads(line) for line in f if line.strip()]
+        else:
+            new_features = json.load(f)["features"]
+
+    segment = append_segment(new_features, base)
+    print(f"✅ Appended {len(new_features)} events")
+    print(f"💾 Saved to: {segment}")
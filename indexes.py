@@ -0,0 +1,568 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# FILTER INDEX (YEAR × DISASTER TYPE)
+# ======================================================
+# Row ids are positions in the event DataFrame (usable with df.iloc).
+
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+class FilterIndex:
+    # Built once per dataset. Every sidebar selection is answered by a
+    # dictionary lookup returning a sorted row-id array.
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.all_rows = np.arange(self.n_rows, dtype=np.int64)
+
+        self.by_year = _group_rows(df, "Year")
+        self.by_type = _group_rows(df, "Disaster_Type")
+        self.by_year_type = _group_rows(df, ["Year", "Disaster_Type"])
+
+        self.years = sorted(self.by_year)
+        self.types = sorted(self.by_type)
+
+    def select(self, year="All", disaster_type="All"):
+        # `year` is "All", one year or an inclusive (start, end) range
+        if isinstance(year, tuple):
+            return self._select_range(*year, disaster_type)
+        if year == "All" and disaster_type == "All":
+            return self.all_rows
+        if year == "All":
+            return self.by_type.get(disaster_type, EMPTY_ROWS)
+        if disaster_type == "All":
+            return self.by_year.get(year, EMPTY_ROWS)
+        return self.by_year_type.get((year, disaster_type), EMPTY_ROWS)
+
+    def _select_range(self, start, end, disaster_type):
+        years = [y for y in self.years if start <= y <= end]
+        if len(years) == len(self.years):
+            return self.select("All", disaster_type)
+        parts = [self.select(y, disaster_type) for y in years]
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return EMPTY_ROWS
+        if len(parts) == 1:
+            return parts[0]
+        # Each year's rows are sorted; the union needs one sort
+        return np.sort(np.concatenate(parts))
+
+    def extend(self, delta):
+        # New index covering this one plus `delta` appended after it; only
+        # the groups touched by the delta are rebuilt
+        offset = self.n_rows
+        out = object.__new__(FilterIndex)
+        out.n_rows = offset + len(delta)
+        out.all_rows = np.arange(out.n_rows, dtype=np.int64)
+
+        out.by_year = _merge_groups(self.by_year, _group_rows(delta, "Year"), offset)
+        out.by_type = _merge_groups(self.by_type, _group_rows(delta, "Disaster_Type"), offset)
+        out.by_year_type = _merge_groups(
+            self.by_year_type, _group_rows(delta, ["Year", "Disaster_Type"]), offset
+        )
+
+        out.years = sorted(out.by_year)
+        out.types = sorted(out.by_type)
+        return out
+
+
+def _merge_groups(old, new, offset):
+    merged = dict(old)
+    for key, rows in new.items():
+        rows = rows + offset
+        merged[key] = np.concatenate([old[key], rows]) if key in old else rows
+    return merged
+
+
+def _group_rows(df, keys):
+    # groupby().indices keeps original order inside each group, so every
+    # array is already sorted
+    return {
+        _plain(k): rows.astype(np.int64, copy=False)
+        for k, rows in df.groupby(keys, sort=False, observed=True).indices.items()
+    }
+
+
+def _plain(key):
+    # numpy scalars → Python values so lookups from widgets always match
+    if isinstance(key, tuple):
+        return tuple(_plain(k) for k in key)
+    return key.item() if hasattr(key, "item") else key
+
+
+def take_rows(df, row_ids):
+    # Whole-dataset selections reuse the shared frame instead of copying it
+    if len(row_ids) == len(df):
+        return df
+    return df.iloc[row_ids]
+
+
+# ======================================================
+# ZOOM-AWARE CLUSTER INDEX
+# ======================================================
+# Events are snapped to a square grid per zoom level; the cell width halves
+# with every zoom step (CLUSTER_CELL_DEGREES / 2**zoom ≈ 64px on screen).
+# Cell ids are computed once per dataset, so a view only pays a bincount over
+# the selected rows and returns at most one bucket per occupied cell.
+
+CLUSTER_ZOOM_LEVELS = list(range(3, 13))
+CLUSTER_CELL_DEGREES = 90.0
+
+BUCKET_COLUMNS = ["Lat", "Lon", "Events", "Deaths", "Major", "Minor"]
+
+
+def _cluster_cells(lat, lon, zoom):
+    size = CLUSTER_CELL_DEGREES / 2 ** zoom
+    n_cols = int(np.ceil(360.0 / size))
+    col = np.floor((lon + 180.0) / size).astype(np.int64)
+    row = np.floor((lat + 90.0) / size).astype(np.int64)
+    return row * n_cols + col
+
+
+class ClusterIndex:
+
+    def __init__(self, df, zoom_levels=CLUSTER_ZOOM_LEVELS):
+        self.zoom_levels = list(zoom_levels)
+        self.lat = df["Lat"].to_numpy(dtype=np.float64)
+        self.lon = df["Lon"].to_numpy(dtype=np.float64)
+        self.deaths = df["Deaths"].to_numpy(dtype=np.int64)
+        self.major = (df["Risk_Level"] == "Major").to_numpy()
+
+        self.cells = {z: _cluster_cells(self.lat, self.lon, z) for z in self.zoom_levels}
+
+    def extend(self, delta):
+        out = object.__new__(ClusterIndex)
+        tail = ClusterIndex(delta, self.zoom_levels)
+        out.zoom_levels = self.zoom_levels
+        for name in ("lat", "lon", "deaths", "major"):
+            setattr(out, name, np.concatenate([getattr(self, name), getattr(tail, name)]))
+        out.cells = {z: np.concatenate([self.cells[z], tail.cells[z]]) for z in self.zoom_levels}
+        return out
+
+    def level_for(self, zoom):
+        # Finest precomputed level not finer than the requested zoom
+        zoom = int(zoom)
+        levels = [z for z in self.zoom_levels if z <= zoom]
+        return levels[-1] if levels else self.zoom_levels[0]
+
+    def buckets(self, row_ids, zoom):
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        if not len(row_ids):
+            return pd.DataFrame(columns=BUCKET_COLUMNS)
+
+        cells = self.cells[self.level_for(zoom)][row_ids]
+        _, inverse = np.unique(cells, return_inverse=True)
+
+        events = np.bincount(inverse)
+        major = np.bincount(inverse, weights=self.major[row_ids]).astype(np.int64)
+
+        return pd.DataFrame({
+            "Lat": np.bincount(inverse, weights=self.lat[row_ids]) / events,
+            "Lon": np.bincount(inverse, weights=self.lon[row_ids]) / events,
+            "Events": events,
+            "Deaths": np.bincount(inverse, weights=self.deaths[row_ids]).astype(np.int64),
+            "Major": major,
+            "Minor": events - major
+        }, columns=BUCKET_COLUMNS)
+
+
+# ======================================================
+# SPATIAL INDEX (RADIUS / BOUNDING BOX)
+# ======================================================
+# Uniform lat/lon grid with rows sorted by cell id. Cells of one grid row are
+# contiguous ids, so a box touches one contiguous slice per grid row, found by
+# binary search. Candidates are then refined exactly (box test or haversine).
+
+SPATIAL_CELL_DEGREES = 0.5
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat, lon, lat0, lon0):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat0, lon0 = np.radians(lat0), np.radians(lon0)
+    a = (
+        np.sin((lat - lat0) / 2) ** 2
+        + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SpatialIndex:
+
+    def __init__(self, df, cell_degrees=SPATIAL_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.n_cols = int(np.ceil(360.0 / cell_degrees))
+        self.n_rows = int(np.ceil(180.0 / cell_degrees))
+
+        self.lat = df["Lat"].to_numpy(dtype=np.float64)
+        self.lon = df["Lon"].to_numpy(dtype=np.float64)
+
+        cells = self._cells(self.lat, self.lon)
+        self.order = np.argsort(cells, kind="stable").astype(np.int64)
+        self.sorted_cells = cells[self.order]
+
+    def extend(self, delta):
+        # Merge the delta's sorted cells into the existing order (a linear
+        # insert) instead of re-sorting every point
+        offset = len(self.lat)
+        lat = delta["Lat"].to_numpy(dtype=np.float64)
+        lon = delta["Lon"].to_numpy(dtype=np.float64)
+
+        cells = self._cells(lat, lon)
+        order = np.argsort(cells, kind="stable").astype(np.int64)
+        at = np.searchsorted(self.sorted_cells, cells[order], side="right")
+
+        out = object.__new__(SpatialIndex)
+        out.cell_degrees, out.n_cols, out.n_rows = self.cell_degrees, self.n_cols, self.n_rows
+        out.lat = np.concatenate([self.lat, lat])
+        out.lon = np.concatenate([self.lon, lon])
+        out.sorted_cells = np.insert(self.sorted_cells, at, cells[order])
+        out.order = np.insert(self.order, at, order + offset)
+        return out
+
+    def _cells(self, lat, lon):
+        row, col = self._grid(lat, lon)
+        return row * self.n_cols + col
+
+    def _grid(self, lat, lon):
+        row = np.floor((np.asarray(lat) + 90.0) / self.cell_degrees).astype(np.int64)
+        col = np.floor((np.asarray(lon) + 180.0) / self.cell_degrees).astype(np.int64)
+        return (
+            np.clip(row, 0, self.n_rows - 1),
+            np.clip(col, 0, self.n_cols - 1)
+        )
+
+    def _candidates(self, south, west, north, east):
+        (r0, r1), (c0, c1) = self._grid([south, north], [west, east])
+        band = np.arange(r0, r1 + 1) * self.n_cols
+        starts = np.searchsorted(self.sorted_cells, band + c0, side="left")
+        ends = np.searchsorted(self.sorted_cells, band + c1, side="right")
+
+        if not len(starts) or (ends - starts).sum() == 0:
+            return EMPTY_ROWS
+        return np.concatenate([self.order[s:e] for s, e in zip(starts, ends) if e > s])
+
+    def bbox(self, south, west, north, east):
+        # Sorted row ids with south <= lat <= north and west <= lon <= east
+        rows = self._candidates(south, west, north, east)
+        lat, lon = self.lat[rows], self.lon[rows]
+        keep = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return np.sort(rows[keep])
+
+    def radius(self, lat, lon, km):
+        # Sorted row ids within `km` great-circle distance of (lat, lon)
+        dlat = np.degrees(km / EARTH_RADIUS_KM)
+        coslat = np.cos(np.radians(lat))
+        dlon = 180.0 if coslat < 1e-6 else min(180.0, dlat / coslat)
+
+        rows = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        keep = haversine_km(self.lat[rows], self.lon[rows], lat, lon) <= km
+        return np.sort(rows[keep])
+
+
+def intersect_rows(a, b):
+    # Both inputs are sorted, duplicate-free row-id arrays
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+# ======================================================
+# SORT ORDERS FOR PAGED TABLES
+# ======================================================
+# One stable argsort per column, built the first time that column is sorted
+# on. A row's rank is its position in that order, so ordering any selection
+# is an integer comparison, and a page only needs the first offset + limit
+# ranks (argpartition) rather than a full sort of the selection.
+
+
+class SortIndex:
+
+    def __init__(self, df):
+        self.df = df
+        self.orders = {}
+        self.ranks = {}
+        self._lock = threading.Lock()
+
+    def rank(self, column):
+        with self._lock:
+            if column not in self.orders:
+                order = np.argsort(_sort_keys(self.df[column]), kind="stable").astype(np.int64)
+                self._set(column, order)
+            return self.orders[column], self.ranks[column]
+
+    def _set(self, column, order):
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order), dtype=np.int64)
+        order.flags.writeable = False
+        ranks.flags.writeable = False
+        self.orders[column] = order
+        self.ranks[column] = ranks
+
+    def page(self, row_ids, column, ascending=True, offset=0, limit=50):
+        # Row ids of rows [offset, offset + limit) of the selection sorted by
+        # `column`; ties keep row order (reversed when descending)
+        order, ranks = self.rank(column)
+        end = offset + limit
+
+        if len(row_ids) == len(order):
+            # Whole dataset: the global order is already the answer
+            return order[offset:end] if ascending else order[::-1][offset:end]
+
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        keys = ranks[row_ids] if ascending else -ranks[row_ids]
+        if end < len(keys):
+            head = np.argpartition(keys, end - 1)[:end]
+            head = head[np.argsort(keys[head])]
+        else:
+            head = np.argsort(keys)
+        return row_ids[head[offset:end]]
+
+    def extend(self, df):
+        # Index over `df` = this frame plus appended rows: each built order
+        # takes the new rows by sorted insertion, not a full re-sort
+        out = SortIndex(df)
+        n_old = len(self.df)
+        with self._lock:
+            built = dict(self.orders)
+
+        for column, order in built.items():
+            keys = _sort_keys(df[column])
+            new = n_old + np.argsort(keys[n_old:], kind="stable").astype(np.int64)
+            at = np.searchsorted(keys[order], keys[new], side="right")
+            out._set(column, np.insert(order, at, new))
+        return out
+
+
+def _sort_keys(values):
+    # Categoricals sort by code (categories are kept sorted), the rest by value
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy()
+    return values.to_numpy()
+
+
+# ======================================================
+# BITMAP INDEX (MULTI-VALUE FILTERS)
+# ======================================================
+# One bitset per distinct value of each filter column, bit i = row i, packed
+# into bytes and padded to whole 64-bit words. A multi-select filter ORs the
+# bitsets of the chosen values within a column and ANDs the columns together,
+# i.e. a handful of word-wise operations over n / 64 words.
+
+BITMAP_COLUMNS = ["Year", "Disaster_Type", "State", "Risk_Level", "Source"]
+
+# Byte value → its set bit positions, flattened (BYTE_BITS_START[v] is where
+# byte v's positions begin), for decoding bitsets a byte at a time
+_BYTE_FLAGS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little")
+BYTE_POPCOUNT = _BYTE_FLAGS.sum(axis=1).astype(np.int64)
+BYTE_BITS = np.nonzero(_BYTE_FLAGS)[1].astype(np.int64)
+BYTE_BITS_START = np.cumsum(BYTE_POPCOUNT) - BYTE_POPCOUNT
+
+
+class BitmapIndex:
+
+    def __init__(self, df, columns=BITMAP_COLUMNS):
+        self.columns = list(columns)
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self.bitmaps[col] = {
+                _plain(value): self._pack(codes == k)
+                for k, value in enumerate(uniques)
+            }
+
+    @property
+    def n_bytes(self):
+        return -(-self.n_rows // 64) * 8
+
+    def _pack(self, flags):
+        out = np.zeros(self.n_bytes, dtype=np.uint8)
+        packed = np.packbits(flags, bitorder="little")
+        out[:len(packed)] = packed
+        return out
+
+    def values(self, column):
+        return sorted(self.bitmaps[column])
+
+    def mask(self, where):
+        # where: {column: values}; a column with no values is unconstrained.
+        # Returns the packed bitset, or None when nothing is constrained.
+        result = None
+        for col, values in where.items():
+            if not values:
+                continue
+            words = np.zeros(self.n_bytes // 8, dtype=np.uint64)
+            for value in values:
+                bits = self.bitmaps[col].get(value)
+                if bits is not None:
+                    words |= bits.view(np.uint64)
+            result = words if result is None else (result & words)
+        return result
+
+    def rows(self, words):
+        # Dense results unpack everything in one pass. Otherwise only the
+        # non-zero bytes of the non-zero words are decoded, through the byte
+        # tables above: O(n / 64 + matches).
+        matches = int(BYTE_POPCOUNT[words.view(np.uint8)].sum())
+        if matches * 3 > self.n_rows:
+            flags = np.unpackbits(words.view(np.uint8), count=self.n_rows, bitorder="little")
+            return np.flatnonzero(flags).astype(np.int64)
+
+        nz = np.flatnonzero(words)
+        data = words[nz].view(np.uint8)
+        nzb = np.flatnonzero(data)
+        values = data[nzb]
+        counts = BYTE_POPCOUNT[values]
+        byte_ids = nz[nzb >> 3] * 8 + (nzb & 7)
+        # k-th set bit of a byte is BYTE_BITS[BYTE_BITS_START[value] + k]
+        within = np.repeat(BYTE_BITS_START[values] - (np.cumsum(counts) - counts), counts)
+        return np.repeat(byte_ids * 8, counts) + BYTE_BITS[within + np.arange(matches)]
+
+    def words(self, row_ids):
+        # Packed bitset of the given row ids
+        flags = np.zeros(self.n_bytes * 8, dtype=bool)
+        flags[row_ids] = True
+        return np.packbits(flags, bitorder="little").view(np.uint64)
+
+    def select(self, where):
+        # Sorted row ids matching every constrained column, or None when
+        # `where` constrains nothing (all rows)
+        words = self.mask(where)
+        return None if words is None else self.rows(words)
+
+    def extend(self, delta):
+        # Bitsets grow by the delta's bits only; old words are copied as-is
+        out = object.__new__(BitmapIndex)
+        out.columns = self.columns
+        out.n_rows = self.n_rows + len(delta)
+        out.bitmaps = {}
+        for col in self.columns:
+            merged = {}
+            for value, bits in self.bitmaps[col].items():
+                grown = np.zeros(out.n_bytes, dtype=np.uint8)
+                grown[:len(bits)] = bits
+                merged[value] = grown
+            for value, rows in _group_rows(delta, col).items():
+                bits = merged.setdefault(value, np.zeros(out.n_bytes, dtype=np.uint8))
+                rows = rows + self.n_rows
+                np.bitwise_or.at(bits, rows >> 3, (1 << (rows & 7)).astype(np.uint8))
+            out.bitmaps[col] = merged
+        return out
+
+
+# ======================================================
+# TEXT SEARCH INDEX
+# ======================================================
+# Inverted index over the lower-cased word tokens of the text columns. A
+# free-text column (Event_Name) maps every token to its row postings, kept
+# as a sorted vocabulary with CSR offsets, so all tokens sharing a prefix are
+# one contiguous slice of the postings. Categorical columns (State, Source)
+# only tokenise their few distinct values; the rows of a matching value come
+# from the bitmap index. Query terms AND together, and a term matches any
+# token it is a prefix of, in any column.
+
+TEXT_COLUMNS = ["Event_Name", "State", "Source"]
+TOKEN_PATTERN = r"\w+"
+
+# Sorts after every token sharing a prefix: [term, term + PREFIX_END) spans them
+PREFIX_END = "\U0010ffff"
+
+
+def tokenize(text):
+    return re.findall(TOKEN_PATTERN, str(text).lower())
+
+
+class TextIndex:
+
+    def __init__(self, df, columns=TEXT_COLUMNS):
+        self.columns = list(columns)
+        self.value_columns = [
+            col for col in self.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+        ]
+        self.text_columns = [col for col in self.columns if col not in self.value_columns]
+        self.n_rows = len(df)
+        self.value_tokens = {col: _value_tokens(df[col]) for col in self.value_columns}
+
+        tokens, rows = self._postings(df, 0)
+        codes, vocab = pd.factorize(tokens, sort=True)
+        order = np.lexsort((rows, codes))
+        self.vocab = np.asarray(vocab, dtype=object)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocab)))])
+        self.rows = rows[order]
+
+    def _postings(self, df, offset):
+        # (token, row id) pairs of the free-text columns, one per occurrence
+        tokens, rows = [], []
+        for col in self.text_columns:
+            exploded = (
+                pd.Series(df[col].array).str.lower().str.findall(TOKEN_PATTERN)
+                .explode().dropna()
+            )
+            tokens.append(exploded.to_numpy(dtype=object))
+            rows.append(exploded.index.to_numpy(dtype=np.int64) + offset)
+        if not tokens:
+            return np.empty(0, dtype=object), EMPTY_ROWS
+        return np.concatenate(tokens), np.concatenate(rows)
+
+    def prefix_rows(self, term):
+        # Row postings of every free-text token starting with `term`;
+        # unsorted and possibly repeated
+        lo = np.searchsorted(self.vocab, term, side="left")
+        hi = np.searchsorted(self.vocab, term + PREFIX_END, side="left")
+        return self.rows[self.offsets[lo]:self.offsets[hi]]
+
+    def prefix_values(self, term):
+        # {column: [values]} of the categorical values with a token
+        # starting with `term`
+        return {
+            col: [v for v, tokens in values.items() if any(t.startswith(term) for t in tokens)]
+            for col, values in self.value_tokens.items()
+        }
+
+    def mask(self, query, bitmaps):
+        # Packed bitset of the rows matching every term of `query`, or None
+        # when the query has no terms. `bitmaps` is the BitmapIndex of the
+        # same rows.
+        result = None
+        for term in dict.fromkeys(tokenize(query)):
+            words = bitmaps.words(self.prefix_rows(term))
+            for col, values in self.prefix_values(term).items():
+                if values:
+                    words |= bitmaps.mask({col: values})
+            result = words if result is None else (result & words)
+        return result
+
+    def extend(self, delta):
+        # New tokens are inserted into the vocabulary and the delta's
+        # postings after the existing postings of their token (a linear
+        # insert), instead of re-tokenising the history
+        out = object.__new__(TextIndex)
+        out.columns, out.value_columns, out.text_columns = (
+            self.columns, self.value_columns, self.text_columns
+        )
+        out.n_rows = self.n_rows + len(delta)
+        out.value_tokens = {
+            col: {**values, **_value_tokens(delta[col])}
+            for col, values in self.value_tokens.items()
+        }
+
+        tokens, rows = self._postings(delta, self.n_rows)
+        out.vocab = np.union1d(self.vocab, tokens).astype(object)
+        counts = np.zeros(len(out.vocab), dtype=np.int64)
+        counts[np.searchsorted(out.vocab, self.vocab)] = np.diff(self.offsets)
+
+        ids = np.searchsorted(out.vocab, tokens)
+        order = np.lexsort((rows, ids))
+        at = np.cumsum(counts)[ids[order]]
+        out.rows = np.insert(self.rows, at, rows[order])
+        counts += np.bincount(ids, minlength=len(out.vocab))
+        out.offsets = np.concatenate([[0], np.cumsum(counts)])
+        return out
+
+
+def _value_tokens(values):
+    return {_plain(v): tokenize(v) for v in values.dropna().unique().tolist()}
@@ -0,0 +1,310 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import folium
+from branca.element import MacroElement
+from folium.plugins import FastMarkerCluster, MarkerCluster
+from jinja2 import Template
+
+# ======================================================
+# CONFIG
+# ======================================================
+MAP_CENTER = [22.5, 78.9]
+INDIA_BOUNDS = [[6.5, 68.0], [37.5, 97.5]]
+
+MAJOR_COLOR = "red"
+MINOR_COLOR = "blue"
+
+# "markers"      – one CircleMarker + Tooltip per event (original behaviour)
+# "geojson"      – a single GeoJSON layer, tooltips built from properties
+# "fast_cluster" – FastMarkerCluster fed with compact rows, markers and
+#                  tooltips created in the browser by a JS callback
+# "viewport"     – st_folium reports bounds/zoom back; only the points (or
+#                  buckets) inside the view plus a margin are sent, as a
+#                  feature group swapped into the already-mounted map
+# "aggregated"   – viewport mode that always sends server-side buckets
+#                  (indexes.ClusterIndex) for the view at its zoom, so the
+#                  payload is bounded by the grid cells on screen
+MAP_MODES = ["fast_cluster", "geojson", "markers", "aggregated", "viewport"]
+POINT_MAP_MODES = ["fast_cluster", "geojson", "markers"]
+VIEWPORT_MAP_MODES = ["viewport", "aggregated"]
+DEFAULT_MAP_MODE = "fast_cluster"
+
+# Viewport mode: the loaded area is the view grown by this fraction of its
+# span on every side. Panning inside it reruns st_folium with a byte-identical
+# message, which Streamlit sends as a hash reference to the copy the browser
+# already holds (messages over global.minCachedMessageSize, 10 kB); leaving
+# it sends the new area's layer in full, not a delta.
+VIEWPORT_MARGIN = 0.5
+# Above this many events in the loaded area, send cluster buckets instead
+VIEWPORT_MAX_POINTS = 2000
+
+TOOLTIP_FIELDS = [
+    ("event_name", ""),
+    ("year", "Year"),
+    ("disaster_type", "Disaster Type"),
+    ("incident_level", "Incident Level"),
+    ("Deaths", "Deaths"),
+    ("Affected_Population", "Affected Population"),
+    ("Risk_Score", "Risk Score"),
+    ("source", "Source")
+]
+
+# Row layout sent to the browser in fast_cluster mode (after lat, lon)
+FAST_ROW_FIELDS = [name for name, _ in TOOLTIP_FIELDS]
+
+# FastMarkerCluster wraps this as "var callback = <function>;"
+FAST_CLUSTER_CALLBACK = """
+function (row) {
+    var color = row[5] === "Major" ? "%(major)s" : "%(minor)s";
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 5, color: color, fillColor: color, fill: true, fillOpacity: 0.75
+    });
+    var html =
+        '<div style="font-size:14px; line-height:1.6; width:330px;">' +
+        '<b>' + row[2] + '</b><br><br>' +
+        '<b>Year:</b> ' + row[3] + '<br>' +
+        '<b>Disaster Type:</b> ' + row[4] + '<br>' +
+        '<b>Incident Level:</b> ' + row[5] + '<br><br>' +
+        '<b>Deaths:</b> ' + row[6] + '<br>' +
+        '<b>Affected Population:</b> ' + row[7] + '<br>' +
+        '<b>Risk Score:</b> ' + row[8] + '<br><br>' +
+        '<b>Source:</b> ' + row[9] +
+        '</div>';
+    marker.bindTooltip(html, {sticky: true});
+    return marker;
+}
+""" % {"major": MAJOR_COLOR, "minor": MINOR_COLOR}
+
+# Viewport buckets: [lat, lon, events, deaths, major, minor]
+BUCKET_CALLBACK = """
+function (b) {
+    var color = b[4] >= b[5] ? "%(major)s" : "%(minor)s";
+    var marker = L.circleMarker(new L.LatLng(b[0], b[1]), {
+        radius: 5 + 3 * Math.log2(b[2]), color: color, fillColor: color, fill: true, fillOpacity: 0.6
+    });
+    marker.bindTooltip(
+        '<div style="font-size:14px; line-height:1.6;">' +
+        '<b>Events:</b> ' + b[2] + '<br>' +
+        '<b>Deaths:</b> ' + b[3] + '<br>' +
+        '<b>Major:</b> ' + b[4] + '<br>' +
+        '<b>Minor:</b> ' + b[5] +
+        '</div>',
+        {sticky: true}
+    );
+    return marker;
+}
+""" % {"major": MAJOR_COLOR, "minor": MINOR_COLOR}
+
+
+# ======================================================
+# BASE MAP
+# ======================================================
+def base_map():
+    m = folium.Map(
+        location=MAP_CENTER,
+        zoom_start=45,
+        min_zoom=30,
+        max_bounds=True,
+        tiles=None
+    )
+    folium.TileLayer("OpenStreetMap", no_wrap=True).add_to(m)
+    return m
+
+
+def level_color(level):
+    return MAJOR_COLOR if level == "Major" else MINOR_COLOR
+
+
+# ======================================================
+# LAYERS
+# ======================================================
+def tooltip_html(p):
+    return f"""
+        <div style="font-size:14px; line-height:1.6; width:330px;">
+        <b>{p['event_name']}</b><br><br>
+        <b>Year:</b> {p['year']}<br>
+        <b>Disaster Type:</b> {p['disaster_type']}<br>
+        <b>Incident Level:</b> {p['incident_level']}<br><br>
+        <b>Deaths:</b> {p.get('Deaths','N/A')}<br>
+        <b>Affected Population:</b> {p.get('Affected_Population','N/A')}<br>
+        <b>Risk Score:</b> {round(p.get('Risk_Score',0),2)}<br><br>
+        <b>Source:</b> {p['source']}
+        </div>
+        """
+
+
+def event_marker(f):
+    p = f["properties"]
+    lon, lat = f["geometry"]["coordinates"]
+    return folium.CircleMarker(
+        location=[lat, lon],
+        radius=5,
+        color=level_color(p["incident_level"]),
+        fill=True,
+        fill_opacity=0.75,
+        tooltip=folium.Tooltip(tooltip_html(p), sticky=True)
+    )
+
+
+def add_marker_layer(m, features):
+    cluster = MarkerCluster().add_to(m)
+
+    for f in features:
+        event_marker(f).add_to(cluster)
+
+
+def add_geojson_layer(m, features):
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": list(features)},
+        marker=folium.CircleMarker(radius=5, fill=True, fill_opacity=0.75),
+        style_function=lambda f: {
+            "color": level_color(f["properties"]["incident_level"]),
+            "fillColor": level_color(f["properties"]["incident_level"])
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=[name for name, _ in TOOLTIP_FIELDS],
+            aliases=[label for _, label in TOOLTIP_FIELDS],
+            sticky=True,
+            style="font-size:14px; line-height:1.6;"
+        )
+    ).add_to(m)
+
+
+def fast_rows(features):
+    # [lat, lon, *FAST_ROW_FIELDS] per feature, as FAST_CLUSTER_CALLBACK reads them
+    rows = []
+    for f in features:
+        p = f["properties"]
+        lon, lat = f["geometry"]["coordinates"]
+        rows.append([lat, lon] + [p.get(name, "N/A") for name in FAST_ROW_FIELDS])
+    return rows
+
+
+def add_fast_cluster_layer(m, features):
+    FastMarkerCluster(fast_rows(features), callback=FAST_CLUSTER_CALLBACK).add_to(m)
+
+
+LAYER_BUILDERS = {
+    "markers": add_marker_layer,
+    "geojson": add_geojson_layer,
+    "fast_cluster": add_fast_cluster_layer
+}
+
+
+def build_map(features, mode=DEFAULT_MAP_MODE):
+    # Static page for the point modes; the viewport modes are built per view
+    if mode not in LAYER_BUILDERS:
+        raise ValueError(f"Unknown map mode {mode!r}; expected one of {POINT_MAP_MODES}")
+
+    m = base_map()
+    LAYER_BUILDERS[mode](m, features)
+    m.fit_bounds(INDIA_BOUNDS)
+    return m
+
+
+def render_map_html(features, mode=DEFAULT_MAP_MODE):
+    return build_map(features, mode).get_root().render()
+
+
+# ======================================================
+# VIEWPORT MODE
+# ======================================================
+# Bounds are (south, west, north, east) tuples.
+
+def view_bounds(map_state):
+    # Bounds reported by st_folium, or India before the first report
+    bounds = (map_state or {}).get("bounds") or {}
+    sw, ne = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    if None in (sw.get("lat"), sw.get("lng"), ne.get("lat"), ne.get("lng")):
+        (south, west), (north, east) = INDIA_BOUNDS
+        return south, west, north, east
+    return sw["lat"], sw["lng"], ne["lat"], ne["lng"]
+
+
+def expand_bounds(bounds, margin=VIEWPORT_MARGIN):
+    south, west, north, east = bounds
+    dlat, dlon = (north - south) * margin, (east - west) * margin
+    return (
+        max(-90.0, south - dlat), max(-180.0, west - dlon),
+        min(90.0, north + dlat), min(180.0, east + dlon)
+    )
+
+
+def bounds_contain(outer, inner):
+    return (
+        outer[0] <= inner[0] and outer[1] <= inner[1]
+        and outer[2] >= inner[2] and outer[3] >= inner[3]
+    )
+
+
+class CompactMarkers(MacroElement):
+    # One JSON array of rows and one JS function that turns a row into a
+    # circle marker with its tooltip, added to the parent layer: a few dozen
+    # bytes per event or bucket instead of a folium CircleMarker + Tooltip each
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function () {
+            var layer = {{ this._parent.get_name() }};
+            var marker = {{ this.callback }};
+            {{ this.rows|tojson }}.forEach(function (row) { marker(row).addTo(layer); });
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, rows, callback):
+        super().__init__()
+        self._name = "CompactMarkers"
+        self.rows = rows
+        self.callback = callback
+
+
+def viewport_layer(features=None, buckets=None):
+    # Feature group for st_folium(feature_group_to_add=...): either the
+    # individual events of the loaded area or its cluster buckets
+    layer = folium.FeatureGroup(name="events")
+    if buckets is not None:
+        rows = [
+            [round(lat, 4), round(lon, 4), int(n), int(d), int(ma), int(mi)]
+            for lat, lon, n, d, ma, mi in buckets.itertuples(index=False)
+        ]
+        CompactMarkers(rows, BUCKET_CALLBACK).add_to(layer)
+    else:
+        CompactMarkers(fast_rows(features), FAST_CLUSTER_CALLBACK).add_to(layer)
+    return layer
+
+
+def viewport_base_map():
+    m = base_map()
+    m.fit_bounds(INDIA_BOUNDS)
+    return m
+
+
+# ======================================================
+# PAYLOAD MEASUREMENT
+# ======================================================
+# python map_layers.py [mode ...]
+# Builds each mode for 1k/10k/100k events (the loaded dataset repeated) and
+# reports server build time and HTML payload size. Time-to-first-paint has to
+# be read in a browser by opening the HTML files written to the temp dir.
+if __name__ == "__main__":
+    from data_loader import EventFeatures, load_events
+
+    import numpy as np
+
+    modes = sys.argv[1:] or list(LAYER_BUILDERS)
+    events = EventFeatures(load_events())
+
+    for n in (1_000, 10_000, 100_000):
+        rows = np.arange(n) % len(events)
+        for mode in modes:
+            t0 = time.perf_counter()
+            html = render_map_html(events.take(rows), mode)
+            elapsed = time.perf_counter() - t0
+
+            out = Path(tempfile.gettempdir()) / f"map_{mode}_{n}.html"
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"{mode:>12} {n:>7} events  {elapsed:7.2f} s  {len(html.encode()) / 1e6:8.2f} MB  → {out}")
@@ -0,0 +1,116 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# CONFIG
+# ======================================================
+# A session that has not rerun for this long no longer counts as a viewer
+SESSION_TTL_SECONDS = 15 * 60
+
+# Viewer count the projection in the debug panel is made for
+TARGET_VIEWERS = 200
+
+
+# ======================================================
+# DEEP SIZES
+# ======================================================
+def deep_nbytes(obj, seen):
+    # Approximate memory held by `obj` and everything it references. Objects
+    # whose id is already in `seen` are not counted again, which is how
+    # per-session sizes leave out data shared with the process-wide dataset.
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        # Views are charged to the array that owns the buffer
+        if obj.base is not None and id(obj.base) in seen:
+            return 0
+        return obj.nbytes if obj.flags.owndata else 0
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            deep_nbytes(k, seen) + deep_nbytes(v, seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_nbytes(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + deep_nbytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+def dataset_nbytes(data):
+    # {component: bytes} for one Dataset snapshot, plus the ids of every
+    # object counted, so session accounting can skip anything shared
+    seen = set()
+    components = {
+        "events": data.df,
+        "filter_index": data.filter_index,
+        "bitmap_index": data.bitmap_index,
+        "cube": data.cube,
+        "places": (data.centres, data.places),
+        "cluster_index": data._cluster_index,
+        "spatial_index": data._spatial_index,
+        "text_index": data._text_index,
+        "sort_index": data.sort_index if data.sort_index.orders else None
+    }
+    sizes = {}
+    for name, obj in components.items():
+        if obj is not None:
+            sizes[name] = deep_nbytes(obj, seen)
+    return sizes, seen
+
+
+# ======================================================
+# PER-SESSION REGISTRY
+# ======================================================
+class SessionRegistry:
+    # Last reported footprint of every live session in the process.
+    # "retained" is what stays in st.session_state between reruns; "working"
+    # is what one rerun materialises (selection, table slice) and frees.
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id, retained, working):
+        with self._lock:
+            self.sessions[session_id] = {
+                "retained": retained,
+                "working": working,
+                "seen": time.monotonic()
+            }
+
+    def report(self, shared_bytes, viewers=TARGET_VIEWERS):
+        now = time.monotonic()
+        with self._lock:
+            for sid in [s for s, v in self.sessions.items() if now - v["seen"] > self.ttl_seconds]:
+                del self.sessions[sid]
+            sessions = list(self.sessions.values())
+
+        retained = [s["retained"] for s in sessions] or [0]
+        working = [s["working"] for s in sessions] or [0]
+        mean_retained = sum(retained) / len(retained)
+        return {
+            "sessions": len(sessions),
+            "shared_mb": round(shared_bytes / 1e6, 2),
+            "session_retained_mean_kb": round(mean_retained / 1e3, 1),
+            "session_retained_max_kb": round(max(retained) / 1e3, 1),
+            "session_working_max_kb": round(max(working) / 1e3, 1),
+            "sessions_total_mb": round(sum(retained) / 1e6, 2),
+            # Shared data once, retained state per viewer, plus the largest
+            # transient working set of a rerun
+            f"projected_mb_{viewers}_viewers": round(
+                (shared_bytes + viewers * mean_retained + max(working)) / 1e6, 2
+            )
+        }
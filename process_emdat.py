@@ -1,7 +1,13 @@
+import argparse
+import gzip
 import json
-import random
+import os
+from collections import deque
+from multiprocessing import Pool
 from pathlib import Path
 
+import numpy as np
+
 # ======================================================
 # CONFIG
 # ======================================================
@@ -10,8 +16,17 @@ END_YEAR = 2025
 MIN_EVENTS_PER_YEAR = 15
 MAX_EVENTS_PER_YEAR = 40
 
+# 70% of events of a type with a preference land in its preferred regions
+PREFERRED_PROBABILITY = 0.7
+
+# Upper bound on events generated (and encoded) by one worker task
+SHARD_EVENTS = 100_000
+
+# Encoded shards waiting to be written, per worker. Workers that get ahead
+# of a slow writer (gzip, slow disk) wait instead of queueing every shard.
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
 OUTPUT_FILE = Path("data/new_original_india_disasters_synthetic_verified.geojson")
-OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 # ======================================================
 # LAND POINTS (50+ with neighbors)
@@ -119,80 +134,270 @@ DISASTER_STATE_PREFERENCE = {
     "Landslide": ["Kerala", "Karnataka", "Tamil Nadu", "Uttarakhand"],
 }
 
+# ======================================================
+# LOOKUP TABLES
+# ======================================================
+POINT_LAT = np.array([p[1] for p in INDIA_LAND_POINTS])
+POINT_LON = np.array([p[2] for p in INDIA_LAND_POINTS])
+
+# Candidate point indices per disaster type (empty → no preference)
+PREFERRED_POINTS = [
+    np.array(
+        [i for i, p in enumerate(INDIA_LAND_POINTS)
+         if p[0] in DISASTER_STATE_PREFERENCE.get(d, [])],
+        dtype=np.int64
+    )
+    for d in DISASTER_TYPES
+]
+
 # ======================================================
 # HELPERS
 # ======================================================
-def risk_level(score):
-    if score > 7000:
-        return "High"
-    elif score > 3000:
-        return "Medium"
-    return "Low"
+RISK_LEVELS = ["Low", "Medium", "High"]
+INCIDENT_LEVELS = ["Minor", "Major"]
 
 
-def choose_state_for_disaster(disaster):
-    preferred = DISASTER_STATE_PREFERENCE.get(disaster, [])
-    preferred_points = [p for p in INDIA_LAND_POINTS if p[0] in preferred]
+def choose_points(rng, types):
+    # Uniform over all land points, except that PREFERRED_PROBABILITY of the
+    # events of a type with a preference draw from its preferred points
+    points = rng.integers(0, len(INDIA_LAND_POINTS), size=len(types))
+    preferred = rng.random(len(types)) < PREFERRED_PROBABILITY
 
-    # 70% probability for preferred regions
-    if preferred_points and random.random() < 0.7:
-        return random.choice(preferred_points)
+    for t, candidates in enumerate(PREFERRED_POINTS):
+        if not len(candidates):
+            continue
+        rows = np.flatnonzero(preferred & (types == t))
+        points[rows] = candidates[rng.integers(0, len(candidates), size=len(rows))]
 
-    return random.choice(INDIA_LAND_POINTS)
+    return points
 
 # ======================================================
-# GENERATE FEATURES
+# GENERATE COLUMNS
 # ======================================================
-features = []
+def generate_shard(year, first, n_events, seed):
+    # One batch of events for `year`, numbered from first + 1. All fields are
+    # drawn as whole columns from a generator seeded for this shard only.
+    rng = np.random.default_rng(seed)
 
-for year in range(START_YEAR, END_YEAR + 1):
+    types = rng.integers(0, len(DISASTER_TYPES), size=n_events)
+    deaths = rng.integers(0, 201, size=n_events)
+    affected = rng.integers(1_000, 5_000_001, size=n_events)
+    risk_score = np.round(rng.uniform(500, 10_000, size=n_events), 2)
+    points = choose_points(rng, types)
+    sources = rng.integers(0, len(DATA_SOURCES), size=n_events)
+
+    return {
+        "year": year,
+        "number": np.arange(first + 1, first + n_events + 1),
+        "type": types,
+        "point": points,
+        "Deaths": deaths,
+        "Affected_Population": affected,
+        "Risk_Score": risk_score,
+        "major": risk_score > 7000,
+        "risk": (risk_score > 3000).astype(np.int64) + (risk_score > 7000),
+        "source": sources
+    }
 
-    events_this_year = random.randint(
-        MIN_EVENTS_PER_YEAR,
-        MAX_EVENTS_PER_YEAR
-    )
 
-    for i in range(events_this_year):
-        disaster = random.choice(DISASTER_TYPES)
-
-        deaths = random.randint(0, 200)
-        affected = random.randint(1_000, 5_000_000)
-        risk_score = round(random.uniform(500, 10_000), 2)
-
-        state, lat, lon = choose_state_for_disaster(disaster)
-
-        features.append({
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [lon, lat]
-            },
-            "properties": {
-                "state": state,
-                "event_name": f"{disaster} Incident {i + 1} ({year})",
-                "year": year,
-                "disaster_type": disaster,
-                "incident_level": "Major" if risk_score > 7000 else "Minor",
-                "Deaths": deaths,
-                "Affected_Population": affected,
-                "Risk_Score": risk_score,
-                "Risk_Level": risk_level(risk_score),
-                "source": random.choice(DATA_SOURCES)
-   }
-        })
+def plan_shards(seed=None, events=None):
+    # Per-year event counts, then one task per year split into chunks of at
+    # most SHARD_EVENTS. Every chunk gets its own child seed, so the output
+    # depends only on (seed, events), never on the number of workers.
+    root = np.random.SeedSequence(seed)
+    count_seq, year_seq = root.spawn(2)
+    years = list(range(START_YEAR, END_YEAR + 1))
+
+    if events is None:
+        counts = np.random.default_rng(count_seq).integers(
+            MIN_EVENTS_PER_YEAR, MAX_EVENTS_PER_YEAR + 1, size=len(years)
+        )
+    else:
+        counts = np.full(len(years), events // len(years))
+        counts[: events % len(years)] += 1
+
+    shards = []
+    for year, count, seq in zip(years, counts.tolist(), year_seq.spawn(len(years))):
+        starts = range(0, count, SHARD_EVENTS)
+        for first, part_seq in zip(starts, seq.spawn(len(starts))):
+            shards.append((year, first, min(SHARD_EVENTS, count - first), part_seq))
+    return root.entropy, shards
+
 
 # ======================================================
-# SAVE GEOJSON
+# OUTPUT FILES
+# ======================================================
+def open_output(path, compress):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def output_path(path, ndjson, compress):
+    path = Path(path)
+    if ndjson and path.suffix == ".geojson":
+        path = path.with_suffix(".ndjson")
+    if compress and path.suffix != ".gz":
+        path = path.with_name(path.name + ".gz")
+    return path
+
+
 # ======================================================
-geojson = {
-    "type": "FeatureCollection",
-    "features": features
+# SHARD ENCODING
+# ======================================================
+# Workers format their shard straight from the columns with templates and
+# pre-encoded string tables. "pretty" is the json.dump(geojson, indent=2)
+# layout, "minify" and "ndjson" use compact separators.
+
+PRETTY_FEATURE = """    {
+      "type": "Feature",
+      "geometry": {
+        "type": "Point",
+        "coordinates": [
+          %s,
+          %s
+        ]
+      },
+      "properties": {
+        "state": %s,
+        "event_name": "%s Incident %d (%d)",
+        "year": %d,
+        "disaster_type": %s,
+        "incident_level": %s,
+        "Deaths": %d,
+        "Affected_Population": %d,
+        "Risk_Score": %r,
+        "Risk_Level": %s,
+        "source": %s
+      }
+    }"""
+
+COMPACT_FEATURE = (
+    '{"type":"Feature","geometry":{"type":"Point","coordinates":[%s,%s]},'
+    '"properties":{"state":%s,"event_name":"%s Incident %d (%d)","year":%d,'
+    '"disaster_type":%s,"incident_level":%s,"Deaths":%d,"Affected_Population":%d,'
+    '"Risk_Score":%r,"Risk_Level":%s,"source":%s}}'
+)
+
+# (header, first-item prefix, separator, footer, footer when empty)
+LAYOUTS = {
+    "pretty": ('{\n  "type": "FeatureCollection",\n  "features": [', "\n", ",\n", "\n  ]\n}", "]\n}"),
+    "minify": ('{"type":"FeatureCollection","features":[', "", ",", "]}", "]}"),
+    "ndjson": ("", "", "\n", "\n", "")
 }
 
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(geojson, f, indent=2)
+STATE_JSON = [json.dumps(p[0]) for p in INDIA_LAND_POINTS]
+TYPE_JSON = [json.dumps(d) for d in DISASTER_TYPES]
+SOURCE_JSON = [json.dumps(s) for s in DATA_SOURCES]
+INCIDENT_JSON = [json.dumps(v) for v in INCIDENT_LEVELS]
+RISK_JSON = [json.dumps(v) for v in RISK_LEVELS]
+
+
+def coordinate_text(precision):
+    # Encoded lon/lat per land point, quantized once instead of per event
+    lon = [p[2] if precision is None else round(p[2], precision) for p in INDIA_LAND_POINTS]
+    lat = [p[1] if precision is None else round(p[1], precision) for p in INDIA_LAND_POINTS]
+    return [json.dumps(v) for v in lon], [json.dumps(v) for v in lat]
+
+
+def encode_shard(task):
+    year, first, n_events, seed, layout, precision = task
+    cols = generate_shard(year, first, n_events, seed)
+    lon_text, lat_text = coordinate_text(precision)
+    template = PRETTY_FEATURE if layout == "pretty" else COMPACT_FEATURE
+
+    text = LAYOUTS[layout][2].join([
+        template % (
+            lon_text[point], lat_text[point], STATE_JSON[point],
+            DISASTER_TYPES[t], number, year, year, TYPE_JSON[t],
+            INCIDENT_JSON[major], deaths, affected, score,
+            RISK_JSON[risk], SOURCE_JSON[source]
+        )
+        for number, t, point, deaths, affected, score, major, risk, source in zip(
+            cols["number"].tolist(), cols["type"].tolist(), cols["point"].tolist(),
+            cols["Deaths"].tolist(), cols["Affected_Population"].tolist(),
+            cols["Risk_Score"].tolist(), cols["major"].tolist(),
+            cols["risk"].tolist(), cols["source"].tolist()
+        )
+    ])
+    return n_events, text
+
+
+def save_dataset(path, seed=None, events=None, workers=None, ndjson=False,
+                 minify=False, compress=False, precision=None):
+    # Generates and writes the dataset shard by shard, in year order, using a
+    # process pool. At most SHARDS_IN_FLIGHT_PER_WORKER shards per worker are
+    # submitted ahead of the writer, which bounds memory whatever its speed.
+    layout = "ndjson" if ndjson else ("minify" if minify else "pretty")
+    header, first_prefix, sep, footer, empty_footer = LAYOUTS[layout]
+
+    entropy, shards = plan_shards(seed, events)
+    tasks = [(year, first, n, seq, layout, precision) for year, first, n, seq in shards]
+
+    path = output_path(path, ndjson, compress)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    total = 0
+    with open_output(path, compress) as f:
+        f.write(header)
+
+        def write(count, text):
+            nonlocal total
+            if count:
+                f.write((first_prefix if total == 0 else sep) + text)
+                total += count
+
+        if workers > 1 and len(tasks) > 1:
+            workers = min(workers, len(tasks))
+            with Pool(workers) as pool:
+                in_flight = deque()
+                for task in tasks:
+                    if len(in_flight) >= workers * SHARDS_IN_FLIGHT_PER_WORKER:
+                        write(*in_flight.popleft().get())
+                    in_flight.append(pool.apply_async(encode_shard, (task,)))
+                while in_flight:
+                    write(*in_flight.popleft().get())
+        else:
+            for task in tasks:
+                write(*encode_shard(task))
+
+        f.write(footer if total else empty_footer)
+
+    return path, total, entropy
+
+# ======================================================
+# SAVE GEOJSON
+# ======================================================
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the synthetic India disaster dataset")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE)
+    parser.add_argument("--seed", type=int, default=None, help="same seed → byte-identical output")
+    parser.add_argument("--events", type=int, default=None, help="total events, split evenly across years")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--ndjson", action="store_true", help="one feature per line instead of a FeatureCollection")
+    parser.add_argument("--minify", action="store_true", help="no indentation or spaces")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output (.gz)")
+    parser.add_argument("--precision", type=int, default=None, help="round coordinates to N decimals")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    path, total, seed = save_dataset(
+        args.output,
+        seed=args.seed,
+        events=args.events,
+        workers=args.workers,
+        ndjson=args.ndjson,
+        minify=args.minify,
+        compress=args.gzip,
+        precision=args.precision
+    )
 
-print("✅ Synthetic GeoJSON created successfully")
-print(f"📍 Years: {START_YEAR}–{END_YEAR}")
-print(f"📊 Total events: {len(features)}")
-print(f"💾 Saved to: {OUTPUT_FILE}")
+    print("✅ Synthetic GeoJSON created successfully")
+    print(f"📍 Years: {START_YEAR}–{END_YEAR}")
+    print(f"📊 Total events: {total}")
+    print(f"🎲 Seed: {seed}")
+    print(f"💾 Saved to: {path}")
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# ======================================================
+# CONFIG
+# ======================================================
+# DISASTER_PROFILE=1            turn section timing on
+# DISASTER_PROFILE_LOG=<path>   append one JSON line per rerun
+# DISASTER_PROFILE_PROM=<path>  rewrite a Prometheus text file after each
+#                               rerun (node_exporter textfile collector)
+PROFILING = os.environ.get("DISASTER_PROFILE", "").lower() not in ("", "0", "false", "no")
+PROFILE_LOG = os.environ.get("DISASTER_PROFILE_LOG")
+PROFILE_PROM = os.environ.get("DISASTER_PROFILE_PROM")
+
+# Recent durations kept per section for p50/p99
+PROFILE_WINDOW = 1000
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def current_rss_mb():
+    # Resident set size from /proc (Linux); None elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+# ======================================================
+# ONE RERUN
+# ======================================================
+class RunProfile:
+    # Sections are consecutive: section("map") closes whatever section was
+    # open and starts timing the next one, so no code has to be re-indented.
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.started = time.perf_counter()
+        self.sections = {}
+        self._open = None
+
+    def section(self, name):
+        self._close()
+        self._open = (name, time.perf_counter(), current_rss_mb())
+
+    def _close(self):
+        if self._open is None:
+            return
+        name, t0, rss0 = self._open
+        rss1 = current_rss_mb()
+        entry = self.sections.setdefault(name, {"ms": 0.0, "rss_delta_mb": 0.0})
+        entry["ms"] += (time.perf_counter() - t0) * 1000
+        if rss0 is not None and rss1 is not None:
+            entry["rss_delta_mb"] += rss1 - rss0
+        self._open = None
+
+    def finish(self):
+        self._close()
+        total_ms = (time.perf_counter() - self.started) * 1000
+        self.profiler.record(self, total_ms)
+        return total_ms
+
+
+class NullRunProfile:
+    sections = {}
+
+    def section(self, name):
+        pass
+
+    def finish(self):
+        return None
+
+
+# ======================================================
+# PROCESS-WIDE AGGREGATE
+# ======================================================
+class Profiler:
+
+    def __init__(self, enabled=PROFILING, log_path=PROFILE_LOG, prom_path=PROFILE_PROM):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self.durations = {}
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        # Serialises Prometheus file rewrites so reruns finishing together
+        # cannot replace each other's temp file or land out of order
+        self._prom_lock = threading.Lock()
+
+    def start_run(self):
+        return RunProfile(self) if self.enabled else NullRunProfile()
+
+    def record(self, run, total_ms):
+        samples = {name: s["ms"] for name, s in run.sections.items()}
+        samples["rerun"] = total_ms
+
+        with self._lock:
+            for name, ms in samples.items():
+                self.durations.setdefault(name, deque(maxlen=PROFILE_WINDOW)).append(ms)
+                self.totals[name] = self.totals.get(name, 0.0) + ms
+                self.counts[name] = self.counts.get(name, 0) + 1
+
+        if self.log_path:
+            line = {
+                "ts": time.time(),
+                "pid": os.getpid(),
+                "total_ms": round(total_ms, 3),
+                "rss_mb": current_rss_mb(),
+                "sections": {
+                    name: {k: round(v, 3) for k, v in s.items()}
+                    for name, s in run.sections.items()
+                }
+            }
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line) + "\n")
+
+        if self.prom_path:
+            tmp = f"{self.prom_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with self._prom_lock:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(self.prometheus_text())
+                os.replace(tmp, self.prom_path)
+
+    def summary(self):
+        # {section: {"count", "p50_ms", "p90_ms", "p99_ms"}} over the window
+        with self._lock:
+            recent = {name: sorted(d) for name, d in self.durations.items()}
+            counts = dict(self.counts)
+        return {
+            name: {
+                "count": counts[name],
+                **{f"p{int(q * 100)}_ms": round(quantile(values, q), 3) for q in QUANTILES}
+            }
+            for name, values in recent.items()
+        }
+
+    def prometheus_text(self):
+        with self._lock:
+            recent = {name: sorted(d) for name, d in self.durations.items()}
+            totals = dict(self.totals)
+            counts = dict(self.counts)
+
+        lines = [
+            "# HELP disaster_section_seconds Streamlit rerun time per app section.",
+            "# TYPE disaster_section_seconds summary"
+        ]
+        for name in sorted(recent):
+            for q in QUANTILES:
+                lines.append(
+                    f'disaster_section_seconds{{section="{name}",quantile="{q}"}} '
+                    f"{quantile(recent[name], q) / 1000:.6f}"
+                )
+            lines.append(f'disaster_section_seconds_sum{{section="{name}"}} {totals[name] / 1000:.6f}')
+            lines.append(f'disaster_section_seconds_count{{section="{name}"}} {counts[name]}')
+
+        rss = current_rss_mb()
+        if rss is not None:
+            lines += [
+                "# HELP disaster_process_resident_megabytes Resident memory of the app process.",
+                "# TYPE disaster_process_resident_megabytes gauge",
+                f"disaster_process_resident_megabytes {rss:.1f}"
+            ]
+        return "\n".join(lines) + "\n"
+
+
+PROFILER = Profiler()
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pyttsx3
+
+from caches import LRUCache
+
+# ======================================================
+# CONFIG
+# ======================================================
+TTS_CACHE_DIR = Path(tempfile.gettempdir()) / "disaster_tts"
+TTS_CACHE_BYTES = 50 * 1024 * 1024
+TTS_CACHE_ENTRIES = 256
+
+# Render errors remembered for status() once a failed job has left the queue
+TTS_ERRORS_KEPT = 256
+
+# Shown when audio that was rendered has since been evicted from the cache
+EVICTED_ERROR = "the audio is no longer cached; press the button again"
+
+# UI language → voice language code
+LANGUAGE_CODES = {
+    "English": "en",
+    "Tamil": "ta",
+    "Hindi": "hi",
+    "Telugu": "te",
+    "Malayalam": "ml",
+    "French": "fr",
+    "Kannada": "kn",
+    "Spanish": "es",
+    "German": "de",
+    "Arabic": "ar"
+}
+
+
+# ======================================================
+# HELPERS
+# ======================================================
+def speech_text(markdown):
+    # Speak the report, not its markup
+    text = re.sub(r"[*_`#>]", "", markdown)
+    lines = [line.strip() for line in text.splitlines()]
+    return ". ".join(line for line in lines if line)
+
+
+def summary_key(language, text):
+    return language, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _voice_languages(voice):
+    langs = []
+    for lang in getattr(voice, "languages", None) or []:
+        if isinstance(lang, bytes):
+            lang = lang.decode("utf-8", "ignore").lstrip("\x05")
+        langs.append(str(lang).lower())
+    return langs
+
+
+# ======================================================
+# TTS SERVICE
+# ======================================================
+# Speech is rendered to WAV files on one dedicated thread. pyttsx3.init()
+# hands out a single engine per driver for the whole process, and an engine
+# can neither run two loops at once nor keep a voice per caller, so renders
+# are serialised on the thread that owns it. Finished files are kept in a
+# size-bounded LRU keyed by (language, summary hash) and deleted on eviction,
+# so a repeated request is a dictionary lookup and no Streamlit session ever
+# waits on the speech engine.
+
+
+class TTSService:
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.cache_dir.glob("*.wav"):
+            stale.unlink(missing_ok=True)
+
+        self.cache = LRUCache(
+            max_entries=TTS_CACHE_ENTRIES,
+            max_bytes=max_bytes,
+            sizeof=os.path.getsize,
+            on_evict=lambda key, path: Path(path).unlink(missing_ok=True)
+        )
+        self.errors = LRUCache(max_entries=TTS_ERRORS_KEPT)
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+        self.pending = {}
+        self._lock = threading.Lock()
+        # Only ever touched from the render thread
+        self._engine = None
+        self._voices = []
+        self._default_voice = None
+
+    def request(self, language, markdown):
+        # Queue rendering unless the audio is cached or already on its way;
+        # returns the key to poll with status()/audio().
+        text = speech_text(markdown)
+        key = summary_key(language, text)
+
+        if key in self.cache:
+            return key
+
+        with self._lock:
+            if key in self.pending:
+                return key
+            future = self.pool.submit(self._render, key, language, text)
+            self.pending[key] = future
+        # Outside the lock: a job that already finished runs the callback here
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return key
+
+    def _finished(self, key, future):
+        # Every job leaves pending however it ends; failures are kept for
+        # status() in a bounded cache
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            if error is not None:
+                self.errors.put(key, str(error))
+            if self.pending.get(key) is future:
+                del self.pending[key]
+
+    def status(self, key):
+        # "ready", "pending" or "failed" (with the error message)
+        if key in self.cache:
+            return "ready", None
+
+        with self._lock:
+            if key in self.pending:
+                return "pending", None
+            error = self.errors.get(key)
+        if error is not None:
+            return "failed", error
+        # Rendered, then dropped from the cache
+        return "failed", EVICTED_ERROR
+
+    def result(self, key):
+        # (state, error, audio bytes); the audio can still be evicted between
+        # the status check and the read, which reports as failed too
+        state, error = self.status(key)
+        if state != "ready":
+            return state, error, None
+        audio = self.audio(key)
+        if audio is None:
+            return "failed", EVICTED_ERROR, None
+        return "ready", None, audio
+
+    def audio(self, key):
+        path = self.cache.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _get_engine(self):
+        if self._engine is None:
+            self._engine = pyttsx3.init()
+            self._voices = self._engine.getProperty("voices") or []
+            self._default_voice = self._engine.getProperty("voice")
+        return self._engine
+
+    def _select_voice(self, engine, language):
+        code = LANGUAGE_CODES.get(language, "en")
+        for voice in self._voices:
+            langs = _voice_languages(voice)
+            if any(lang.startswith(code) for lang in langs) or f"/{code}" in str(voice.id).lower():
+                engine.setProperty("voice", voice.id)
+                return
+        # No voice for this language: back to the default rather than
+        # keeping whichever voice the previous request picked
+        if self._default_voice is not None:
+            engine.setProperty("voice", self._default_voice)
+
+    def _render(self, key, language, text):
+        engine = self._get_engine()
+        self._select_voice(engine, language)
+
+        path = self.cache_dir / f"{key[1][:16]}_{LANGUAGE_CODES.get(language, 'en')}.wav"
+        engine.save_to_file(text, str(path))
+        engine.runAndWait()
+
+        if not path.exists() or path.stat().st_size == 0:
+            raise RuntimeError("speech engine produced no audio")
+
+        if not self.cache.put(key, str(path)):
+            path.unlink(missing_ok=True)
+            raise RuntimeError("the audio is larger than the whole speech cache")
+        return str(path)